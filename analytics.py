@@ -0,0 +1,206 @@
+# analytics.py
+import math
+import time
+import heapq
+from array import array
+
+# Статистика чата за стрим в фиксированной памяти: сколько бы ни шло сообщений
+# и зрителей, размер структур не растёт (≈ 4 КБ HLL + 2 × Count-Min + кольца).
+# Хэш — встроенный hash() строки (SipHash, кэшируется в самой строке): значения
+# разные между процессами, поэтому статистика не сохраняется и не сливается между воркерами.
+HLL_PRECISION = 12  # 4096 регистров, погрешность ≈ 1.6%
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+TOP_K = 10
+RATE_SECONDS = 60  # окно "сообщений в минуту"
+HISTORY_MINUTES = 12 * 60  # поминутная история для пика
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(key):
+    return hash(key) & _MASK64
+
+
+class HyperLogLog:
+    """Оценка числа уникальных значений: 2**p однобайтовых регистров."""
+
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+        self._alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add_hash(self, h):
+        idx = h >> (64 - self.p)
+        rest = (h << self.p) & _MASK64
+        rank = 64 - self.p + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def add(self, key):
+        self.add_hash(_hash64(key))
+
+    def count(self):
+        registers = self.registers
+        estimate = self._alpha * self.m * self.m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # мало значений — точнее линейный счёт по пустым регистрам
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def clear(self):
+        self.registers = bytearray(self.m)
+
+
+class CountMinSketch:
+    """Частоты ключей с ошибкой только вверх: depth строк по width счётчиков."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def add_hash(self, h, n=1):
+        """Увеличивает счётчики ключа и возвращает его оценку."""
+        # индексы строк из двух половин одного хэша (Kirsch–Mitzenmacher)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        width = self.width
+        estimate = None
+        for i, row in enumerate(self.rows):
+            j = (h1 + i * h2) % width
+            value = row[j] + n
+            row[j] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def clear(self):
+        for row in self.rows:
+            row[:] = array("I", bytes(4 * self.width))
+
+
+class TopK:
+    """
+    k самых частых ключей по оценкам Count-Min: словарь кандидатов и min-куча.
+    Устаревшие записи кучи (ключ уже с большей оценкой) отбрасываются лениво.
+    """
+
+    def __init__(self, k=TOP_K, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.counts = {}
+        self._heap = []
+
+    def add(self, key, h=None):
+        estimate = self.sketch.add_hash(_hash64(key) if h is None else h)
+        counts, heap = self.counts, self._heap
+        if key in counts or len(counts) < self.k:
+            counts[key] = estimate
+            heapq.heappush(heap, (estimate, key))
+        else:
+            while counts.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            if estimate <= heap[0][0]:
+                return
+            _, evicted = heapq.heappop(heap)
+            del counts[evicted]
+            counts[key] = estimate
+            heapq.heappush(heap, (estimate, key))
+        if len(heap) > 4 * self.k:
+            self._heap = [(v, key) for key, v in counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n=None):
+        items = sorted(self.counts.items(), key=lambda kv: -kv[1])
+        return items[:n] if n else items
+
+    def clear(self):
+        self.sketch.clear()
+        self.counts = {}
+        self._heap = []
+
+
+class RateRing:
+    """Счётчик событий по слотам фиксированной длины в кольце: сумма за последние slots слотов."""
+
+    def __init__(self, slots, slot_seconds):
+        self.slot_seconds = slot_seconds
+        self.counts = array("I", bytes(4 * slots))
+        self._slot = None  # номер текущего слота (время // slot_seconds)
+
+    def _advance(self, slot):
+        if self._slot is None or slot - self._slot >= len(self.counts):
+            self.counts[:] = array("I", bytes(4 * len(self.counts)))
+        else:
+            for s in range(self._slot + 1, slot + 1):
+                self.counts[s % len(self.counts)] = 0
+        self._slot = slot
+
+    def add(self, now, n=1):
+        slot = int(now // self.slot_seconds)
+        if slot != self._slot:
+            self._advance(slot)
+        self.counts[slot % len(self.counts)] += n
+
+    def total(self, now):
+        slot = int(now // self.slot_seconds)
+        if self._slot is None or slot - self._slot >= len(self.counts):
+            return 0
+        if slot != self._slot:
+            self._advance(slot)
+        return sum(self.counts)
+
+    def peak(self, now):
+        self.total(now)
+        return max(self.counts)
+
+
+class ChatAnalytics:
+    """Статистика чата канала с начала стрима (reset — при переходе в онлайн)."""
+
+    def __init__(self):
+        self.uniques = HyperLogLog()
+        self.chatters = TopK()
+        self.commands = TopK(width=256)
+        self.rate = RateRing(RATE_SECONDS, 1)
+        self.history = RateRing(HISTORY_MINUTES, 60)
+        self.messages = 0
+        self.started_at = time.time()
+
+    def reset(self):
+        self.uniques.clear()
+        self.chatters.clear()
+        self.commands.clear()
+        self.rate = RateRing(RATE_SECONDS, 1)
+        self.history = RateRing(HISTORY_MINUTES, 60)
+        self.messages = 0
+        self.started_at = time.time()
+
+    def on_message(self, login, now=None):
+        now = time.time() if now is None else now
+        h = _hash64(login)
+        self.messages += 1
+        self.uniques.add_hash(h)
+        self.chatters.add(login, h)
+        self.rate.add(now)
+        self.history.add(now)
+
+    def on_command(self, name):
+        self.commands.add(name)
+
+    def per_minute(self, now=None):
+        return self.rate.total(time.time() if now is None else now)
+
+    def snapshot(self, top=3, now=None):
+        now = time.time() if now is None else now
+        return {
+            "messages": self.messages,
+            "per_minute": self.per_minute(now),
+            "peak_per_minute": self.history.peak(now),
+            "unique_chatters": self.uniques.count(),
+            "top_chatters": self.chatters.top(top),
+            "top_commands": self.commands.top(top),
+            "since": self.started_at,
+        }
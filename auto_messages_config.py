@@ -2,18 +2,32 @@
 # file: имя скрипта в папке auto_messages
 # interval: интервал в секундах
 # min_chat_messages: минимальное количество сообщений в чате перед отправкой
+#
+# Условия (необязательные) проверяются по состоянию канала в памяти, до загрузки скрипта.
+# Если условие не выполнено, сообщение не тратит interval: проверка повторится через минуту.
+# games: названия игр — отправлять только когда стример в одной из них (регистр не важен)
+# live_only: False — отправлять и когда стрим офлайн (по умолчанию только во время стрима)
+# min_viewers: минимум зрителей стрима (обновляется опросом helix/streams)
+# hours: (с, до) — часы по местному времени, (22, 3) — с 22:00 до 03:00
+# min_chatters: минимум разных зрителей, писавших в чат за этот стрим (оценка)
 import time
 
 auto_messages = [
     {'file': 'discord_tg.py', 'interval': 20 * 60, 'min_chat_messages': 10},
     {'file': 'команды.py', 'interval': 25 * 60, 'min_chat_messages': 11},
-    {'file': 'info.py', 'interval': 30 * 60, 'min_chat_messages': 11},
+    {'file': 'info.py', 'interval': 30 * 60, 'min_chat_messages': 11, 'games': ['STALCRAFT: X']},
 ]
 
 
-def load_auto_messages():
+# свои списки для отдельных каналов (логин -> список как выше); остальные каналы берут auto_messages
+# Пример: 'other_streamer': [{'file': 'discord_tg.py', 'interval': 15 * 60, 'min_chat_messages': 5}]
+channel_auto_messages = {
+}
+
+
+def load_auto_messages(channel=None):
     messages = []
-    for am in auto_messages:
+    for am in channel_auto_messages.get(channel, auto_messages):
         entry = am.copy()
         entry['last_sent'] = 0
         entry['counter'] = 0
@@ -0,0 +1,168 @@
+# auto_scheduler.py
+import time
+import heapq
+import asyncio
+
+# ---------- условия отправки (ключи записи в auto_messages_config) ----------
+CONDITION_RECHECK = 60  # секунд: через сколько снова проверить запись, не прошедшую условия
+
+
+def compile_conditions(am):
+    """Проверяет условия записи и приводит их к виду для skip_reason. ValueError — условие задано неверно."""
+    games = am.get("games")
+    if games is not None:
+        if isinstance(games, str):
+            games = [games]
+        am["games"] = frozenset(g.lower() for g in games)
+    hours = am.get("hours")
+    if hours is not None:
+        start, end = hours
+        if not (0 <= start <= 24 and 0 <= end <= 24):
+            raise ValueError(f"hours вне 0..24: {hours!r}")
+    for key in ("min_viewers", "min_chatters"):
+        if am.get(key) is not None and not isinstance(am[key], int):
+            raise ValueError(f"{key} должно быть числом: {am[key]!r}")
+    return am
+
+
+def skip_reason(am, state, online, analytics, now=None):
+    """
+    Почему запись сейчас не отправлять (или None). Проверяется только то, что уже в памяти
+    (ChannelState, статистика чата) — без Helix и до загрузки модуля сообщения.
+    """
+    if not online and am.get("live_only", True):
+        return "стрим офлайн"
+    games = am.get("games")
+    if games is not None:
+        if not state.ready:
+            return "игра ещё неизвестна"
+        if state.game_name.lower() not in games:
+            return f"игра {state.game_name or '—'}"
+    min_viewers = am.get("min_viewers")
+    if min_viewers and state.viewer_count < min_viewers:
+        return f"зрителей {state.viewer_count}"
+    hours = am.get("hours")
+    if hours is not None:
+        hour = time.localtime(now).tm_hour
+        start, end = hours
+        inside = start <= hour < end if start <= end else (hour >= start or hour < end)
+        if not inside:
+            return f"сейчас {hour} ч"
+    min_chatters = am.get("min_chatters")
+    if min_chatters:
+        chatters = analytics.uniques.count()
+        if chatters < min_chatters:
+            return f"зрителей в чате ~{chatters}"
+    return None
+
+
+class AutoMessageScheduler:
+    """
+    Планировщик авто-сообщений по ближайшему дедлайну.
+    Записи (dict из auto_messages_config) лежат в куче по времени, когда истечёт interval;
+    когда время вышло, но в чате ещё мало сообщений (min_chat_messages), запись ждёт
+    в списке ожидания, и планировщик просыпается только когда порог будет пройден.
+    Пока стрим офлайн, планировщик спит без таймаута (кроме записей с live_only: False).
+    Запись, не прошедшая условия (skip_reason), откладывается через defer и interval не тратит.
+    Сообщения чата считаются одним общим счётчиком: у записи хранится только значение
+    счётчика на момент последней отправки, так что учёт сообщения — O(1) при любом числе записей.
+    """
+
+    def __init__(self):
+        self.online = False
+        self.chat_total = 0  # сообщений в чате с запуска
+        self._base = {}  # id(am) -> chat_total на момент отправки
+        self._heap = []  # (due, seq, am)
+        self._waiting = []  # время вышло, ждут сообщений в чате
+        self._parked = []  # live_only-записи, чьё время вышло, пока стрим офлайн
+        self._offline = 0  # записей с live_only: False
+        self._chat_needed = None  # сколько ещё сообщений до первого готового из _waiting
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+
+    def reset(self, entries):
+        self._heap = []
+        self._waiting = []
+        self._parked = []
+        self._chat_needed = None
+        self._base = {}
+        self._offline = sum(1 for am in entries if am.get("live_only", True) is False)
+        for am in entries:
+            # сохранённый counter продолжает считаться от текущего значения
+            self._base[id(am)] = self.chat_total - am.get("counter", 0)
+            self._push(am)
+        self._wakeup.set()
+
+    def counter(self, am):
+        """Сколько сообщений было в чате с последней отправки записи."""
+        return self.chat_total - self._base.get(id(am), self.chat_total)
+
+    def _push(self, am, due=None):
+        if due is None:
+            due = am.get("last_sent", 0) + am.get("interval", 600)
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, am))
+
+    def _recalc_chat_needed(self):
+        if not self._waiting:
+            self._chat_needed = None
+            return
+        self._chat_needed = min(am.get("min_chat_messages", 0) - self.counter(am) for am in self._waiting)
+
+    # ---------- события ----------
+    def set_online(self, online):
+        self.online = online
+        if online and self._parked:
+            # время у них уже вышло — сразу в ожидание сообщений чата
+            self._waiting.extend(self._parked)
+            self._parked = []
+        self._wakeup.set()
+
+    def on_chat_message(self):
+        # считаем сообщения для min_chat_messages
+        self.chat_total += 1
+        # все счётчики растут одинаково — достаточно одного числа до ближайшего порога
+        if self._chat_needed is not None:
+            self._chat_needed -= 1
+            if self._chat_needed <= 0:
+                self._wakeup.set()
+
+    def mark_sent(self, am, now):
+        am["last_sent"] = now
+        am["counter"] = 0
+        self._base[id(am)] = self.chat_total
+        self._push(am)
+
+    def defer(self, am, due):
+        """Запись не прошла условия: проверить снова в due, не сбрасывая last_sent и счётчик чата."""
+        self._push(am, due)
+
+    # ---------- ожидание ----------
+    async def wait_due(self):
+        """Ждёт и возвращает список записей, которые пора отправить."""
+        while True:
+            self._wakeup.clear()
+            if self.online or self._offline:
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    self._waiting.append(heapq.heappop(self._heap)[2])
+                if not self.online:
+                    # офлайн ждут только записи с live_only: False, остальные — до начала стрима
+                    self._parked.extend(am for am in self._waiting if am.get("live_only", True))
+                    self._waiting = [am for am in self._waiting if not am.get("live_only", True)]
+
+                ready = [am for am in self._waiting if self.counter(am) >= am.get("min_chat_messages", 0)]
+                if ready:
+                    sent = {id(am) for am in ready}
+                    self._waiting = [am for am in self._waiting if id(am) not in sent]
+                    self._recalc_chat_needed()
+                    return ready
+                self._recalc_chat_needed()
+                timeout = self._heap[0][0] - now if self._heap else None
+            else:
+                timeout = None
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
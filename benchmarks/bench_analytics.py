@@ -0,0 +1,73 @@
+# benchmarks/bench_analytics.py
+# 12-часовой стрим для ChatAnalytics: память по часам (должна стоять на месте),
+# стоимость учёта сообщения и точность против точного подсчёта (set / Counter),
+# который для сравнения растёт вместе с числом зрителей.
+#
+# Запуск: python benchmarks/bench_analytics.py [сообщений_в_секунду] [зрителей]
+import os
+import sys
+import time
+import random
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import ChatAnalytics
+
+HOURS = 12
+COMMANDS = ["ник", "кусь", "панти", "хуй", "drops", "follow", "цель", "stats", "ping"]
+
+
+def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    viewers = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    rnd = random.Random(1)
+    names = [f"viewer_{i}" for i in range(viewers)]
+    # активность зрителей — по Ципфу: немногие пишут постоянно, большинство — пару раз
+    weights = [1 / (i + 1) for i in range(viewers)]
+    per_hour = int(rate * 3600)
+
+    tracemalloc.start()
+    analytics = ChatAnalytics()
+    only_analytics = [tracemalloc.Filter(True, "*analytics.py")]
+    exact_users = Counter()
+    exact_commands = Counter()
+    now = 0.0
+
+    print(f"{rate:g} сообщений/с, {viewers} зрителей, {HOURS} ч")
+    for hour in range(1, HOURS + 1):
+        batch = rnd.choices(names, weights, k=per_hour)
+        commands = [rnd.choice(COMMANDS) if rnd.random() < 0.3 else None for _ in batch]
+        for login, command in zip(batch, commands):
+            now += 1 / rate
+            analytics.on_message(login, now)
+            if command:
+                analytics.on_command(command)
+        exact_users.update(batch)
+        exact_commands.update(c for c in commands if c)
+        # только то, что выделено в analytics.py; точный подсчёт сюда не попадает
+        snapshot = tracemalloc.take_snapshot().filter_traces(only_analytics)
+        used = sum(stat.size for stat in snapshot.statistics("filename"))
+        print(f"час {hour:2d}: память {used / 1024:7.1f} КБ, уникальных ~{analytics.uniques.count()} "
+              f"(точно {len(exact_users)})")
+
+    # время — отдельным прогоном последнего часа: tracemalloc замедляет каждое выделение
+    tracemalloc.stop()
+    fresh = ChatAnalytics()
+    t0 = time.perf_counter()
+    for i, (login, command) in enumerate(zip(batch, commands)):
+        fresh.on_message(login, i / rate)
+        if command:
+            fresh.on_command(command)
+    print(f"учёт сообщения: {(time.perf_counter() - t0) / len(batch) * 1e6:.2f} us")
+    top = [name for name, _ in analytics.chatters.top(5)]
+    print(f"топ чата: {top}")
+    print(f"точный:   {[name for name, _ in exact_users.most_common(5)]}")
+    print(f"топ команд: {analytics.commands.top(3)}, точный: {exact_commands.most_common(3)}")
+    snap = analytics.snapshot(now=now)
+    print(f"в минуту: {snap['per_minute']}, пик: {snap['peak_per_minute']}")
+
+
+if __name__ == "__main__":
+    main()
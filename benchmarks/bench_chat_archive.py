@@ -0,0 +1,77 @@
+# benchmarks/bench_chat_archive.py
+# Архив чата на несколько миллионов сообщений: скорость записи (очередь + фоновый поток,
+# gzip-сегменты с ротацией), поиск !lastseen по mmap-индексу против чтения всего архива.
+#
+# Запуск: python benchmarks/bench_chat_archive.py [сообщений] [зрителей]
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_archive import ChatArchive, LastSeenIndex, INDEX_FILE, iter_messages, list_segments
+
+CHANNELS = ["chan1", "chan2", "chan3"]
+CHAT = [
+    "привет чат", "как дела", "KEKW", "го катку", "стример топ", "PogChamp", "ахаха", "gg",
+    "а когда следующий стрим будет?", "!ник", "!кусь @someone", "лол что это было",
+    "кто-нибудь знает, что за музыка играет сейчас на фоне?",
+]
+LOOKUPS = 100000
+
+
+def main():
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 3000000
+    viewers = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    rnd = random.Random(1)
+    names = [f"viewer_{i}" for i in range(viewers)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ChatArchive(directory, segment_bytes=8 * 1024 * 1024)
+        chunk = 100000
+        t0 = time.perf_counter()
+        append_time = 0.0
+        ts = 1.7e9
+        for start in range(0, n_messages, chunk):
+            # генерация сообщений не входит во время append
+            batch = [(rnd.choice(CHANNELS), rnd.choice(names), rnd.choice(CHAT))
+                     for _ in range(min(chunk, n_messages - start))]
+            t1 = time.perf_counter()
+            for channel, login, text in batch:
+                ts += 0.01
+                archive.append(channel, login, text, ts)
+            append_time += time.perf_counter() - t1
+        archive.stop()
+        total = time.perf_counter() - t0
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        print(f"{n_messages} сообщений, {viewers} зрителей, {len(list_segments(directory))} сегментов, "
+              f"{size / 1024 / 1024:.1f} МБ на диске")
+        print(f"append в event loop: {append_time / n_messages * 1e6:.2f} us/сообщение")
+        print(f"запись (сжатие + индекс): {n_messages / total:,.0f} сообщений/с")
+
+        index = LastSeenIndex(os.path.join(directory, INDEX_FILE), readonly=True)
+        queries = [(rnd.choice(CHANNELS), rnd.choice(names)) for _ in range(LOOKUPS)]
+        t0 = time.perf_counter()
+        found = sum(1 for channel, login in queries if index.get(channel, login) is not None)
+        lookup = (time.perf_counter() - t0) / LOOKUPS
+        print(f"индекс: {len(index)} записей, {os.path.getsize(index.path) / 1024 / 1024:.1f} МБ, "
+              f"поиск {lookup * 1e6:.2f} us ({found}/{LOOKUPS} найдено)")
+
+        # без индекса: последний раз и число сообщений — только полным чтением архива
+        channel, login = queries[0]
+        t0 = time.perf_counter()
+        last, count = None, 0
+        for msg_ts, ch, user, _ in iter_messages(directory, list_segments(directory)):
+            if ch == channel and user == login:
+                last, count = msg_ts, count + 1
+        scan = time.perf_counter() - t0
+        print(f"чтение архива: {scan:.2f} s на один запрос (в {scan / lookup:,.0f} раз дольше)")
+        entry = index.get(channel, login)
+        assert entry is None and count == 0 or (entry[0] == int(last) and entry[1] == count), (entry, last, count)
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_command_loader.py
+# Сравнение задержки на вызов: старая загрузка команды (exec на каждый вызов)
+# против CommandRegistry (кэш модулей с проверкой mtime/хэша).
+#
+# Запуск: python benchmarks/bench_command_loader.py [путь_к_команде] [итераций]
+import os
+import sys
+import time
+import importlib.util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_registry import CommandRegistry
+
+DEFAULT_COMMAND = os.path.join("commands", "кусь.py")
+
+
+def load_every_time(name, path):
+    # так работал Bot.run_custom_command раньше
+    spec = importlib.util.spec_from_file_location(f"commands.{name}_{int(time.time())}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, "run", None)
+
+
+def load_cached(registry, name, path):
+    return registry.get(name, path).func
+
+
+def bench(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "mean": sum(samples) / len(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def fmt(stats):
+    return " ".join(f"{k}={v * 1e6:8.1f}us" for k, v in stats.items())
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_COMMAND
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    registry = CommandRegistry("commands")
+    registry.get(name, path)  # прогрев
+
+    before = bench(lambda: load_every_time(name, path), iterations)
+    after = bench(lambda: load_cached(registry, name, path), iterations)
+
+    print(f"команда: {path}, итераций: {iterations}")
+    print(f"exec на каждый вызов: {fmt(before)}")
+    print(f"CommandRegistry:      {fmt(after)}")
+    print(f"ускорение (mean): x{before['mean'] / after['mean']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_cooldowns.py
+# Память и стоимость проверки cooldown после сессии со 100k разных зрителей:
+# старый dict username -> timestamp против CooldownTable.
+#
+# Запуск: python benchmarks/bench_cooldowns.py [зрителей] [сообщений]
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cooldowns import CooldownTable
+
+COOLDOWN = 5
+COMMANDS = ["ник", "кусь", "панти", "хуй", "drops", "follow", "цель"]
+
+
+def make_stream(chatters, messages, seed=1):
+    # ~20 сообщений в секунду, зрители приходят волнами (рейды), команды случайные
+    rnd = random.Random(seed)
+    names = [f"viewer_{i}" for i in range(chatters)]
+    t = 0.0
+    stream = []
+    for i in range(messages):
+        t += 0.05
+        wave = min(chatters, 1000 + i * chatters // messages)
+        stream.append((names[rnd.randrange(wave)], rnd.choice(COMMANDS), t))
+    return stream
+
+
+def run_dict(stream):
+    cooldowns = {}
+    allowed = 0
+    for user, _cmd, now in stream:
+        last = cooldowns.get(user, 0)
+        if now - last < COOLDOWN:
+            continue
+        cooldowns[user] = now
+        allowed += 1
+    return cooldowns, allowed
+
+
+def run_table(stream):
+    table = CooldownTable(COOLDOWN, {"drops": {"global": 30}, "кусь": {"user": 15}})
+    allowed = 0
+    for user, cmd, now in stream:
+        if not table.check(user, cmd, now=now):
+            allowed += 1
+    return table, allowed
+
+
+def measure(fn, stream):
+    # время и память меряем отдельными прогонами — tracemalloc сильно замедляет код
+    t0 = time.perf_counter()
+    fn(stream)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    obj, allowed = fn(stream)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, allowed, elapsed, current
+
+
+def main():
+    chatters = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    stream = make_stream(chatters, messages)
+    print(f"зрителей: {chatters}, сообщений: {messages}, длительность: {stream[-1][2] / 3600:.1f} ч")
+
+    d, allowed, elapsed, mem = measure(run_dict, stream)
+    print(f"dict:          {len(d):7d} записей, {mem / 1024:8.0f} KiB, {elapsed / messages * 1e9:6.0f} ns/msg, пропущено {allowed}")
+
+    table, allowed, elapsed, mem = measure(run_table, stream)
+    st = table.stats()
+    print(f"CooldownTable: {st['users'] + st['per_command_users']:7d} записей, {mem / 1024:8.0f} KiB, {elapsed / messages * 1e9:6.0f} ns/msg, пропущено {allowed}, отклонено {st['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
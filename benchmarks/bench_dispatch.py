@@ -0,0 +1,77 @@
+# benchmarks/bench_dispatch.py
+# Микробенчмарк горячего пути event_message: поиск команды и учёт сообщения для авто-сообщений.
+# Старый путь: split всего сообщения + точный поиск в dict + цикл по всем авто-сообщениям.
+# Новый: CommandDispatcher (токен до пробела, алиасы, нормализация) + общий счётчик планировщика.
+#
+# Запуск: python benchmarks/bench_dispatch.py [авто_сообщений] [итераций]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dispatcher import CommandDispatcher
+from auto_scheduler import AutoMessageScheduler
+
+COMMANDS = {name: f"commands/{name}.py" for name in
+            ["drops", "follow", "ping", "кусь", "ник", "панти", "хуй", "цель", "цель+", "цель-"]}
+ALIASES = {"nick": "ник", "goal+": "цель+", "goal-": "цель-", "bite": "кусь"}
+
+MESSAGES = [
+    "!ник",
+    "!кусь @someone_with_a_long_name",
+    "!цель+ 5",
+    "!NICK",
+    "!unknown " + "spam " * 80,
+    "!панти " + "очень длинное сообщение " * 20,
+]
+
+
+def old_path(messages, commands, auto_messages):
+    found = 0
+    for content in messages:
+        content = content.strip()
+        for am in auto_messages:
+            am["counter"] = am.get("counter", 0) + 1
+        cmd_name = content.split()[0][1:]
+        if cmd_name in commands:
+            found += 1
+    return found
+
+
+def new_path(messages, dispatcher, scheduler):
+    found = 0
+    for content in messages:
+        content = content.strip()
+        scheduler.on_chat_message()
+        if dispatcher.resolve(dispatcher.token(content)):
+            found += 1
+    return found
+
+
+def bench(fn, iterations):
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / (iterations * len(MESSAGES))
+
+
+def main():
+    n_auto = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    auto_messages = [{"file": f"m{i}.py", "interval": 600, "min_chat_messages": 10} for i in range(n_auto)]
+    dispatcher = CommandDispatcher()
+    dispatcher.rebuild(COMMANDS, ALIASES)
+    scheduler = AutoMessageScheduler()
+    scheduler.reset(auto_messages)
+
+    old = bench(lambda: old_path(MESSAGES, COMMANDS, auto_messages), iterations)
+    new = bench(lambda: new_path(MESSAGES, dispatcher, scheduler), iterations)
+    print(f"авто-сообщений: {n_auto}")
+    print(f"split + цикл по авто-сообщениям: {old * 1e9:8.0f} ns/msg")
+    print(f"CommandDispatcher + общий счётчик: {new * 1e9:8.0f} ns/msg")
+
+
+if __name__ == "__main__":
+    main()
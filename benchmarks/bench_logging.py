@@ -0,0 +1,108 @@
+# benchmarks/bench_logging.py
+# Задержки event loop под нагрузкой логами: обработчики прямо в loop (как было через basicConfig)
+# против очереди с фоновым потоком (log_setup.setup_logging).
+#
+# Запуск: python benchmarks/bench_logging.py [строк_в_секунду] [секунд] [задержка_диска_мс]
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+from logging.handlers import RotatingFileHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_setup
+
+
+class SlowRotatingFileHandler(RotatingFileHandler):
+    """Имитация медленного диска: каждая запись стоит slow_ms."""
+
+    slow_ms = 0
+
+    def emit(self, record):
+        if self.slow_ms:
+            time.sleep(self.slow_ms / 1000)
+        super().emit(record)
+
+
+def reset_root():
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+        h.close()
+
+
+def setup_direct(logs_dir):
+    reset_root()
+    handler = SlowRotatingFileHandler(os.path.join(logs_dir, "bot.log"), maxBytes=256 * 1024, backupCount=5, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(log_setup.LOG_FORMAT))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+    return None
+
+
+def setup_queued(logs_dir):
+    reset_root()
+    # тот же медленный обработчик, но в потоке QueueListener
+    log_setup.RotatingFileHandler = SlowRotatingFileHandler
+    log_setup.LOG_MAX_BYTES = 256 * 1024
+    listener = log_setup.setup_logging(logs_dir)
+    for h in listener.handlers:
+        if isinstance(h, logging.StreamHandler) and not isinstance(h, RotatingFileHandler):
+            h.setLevel(logging.CRITICAL)  # консоль не нужна
+    return listener
+
+
+async def run_load(rate, seconds):
+    lags = []
+
+    async def ticker():
+        interval = 0.001
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - t0 - interval)
+
+    async def producer():
+        batch = max(1, rate // 100)
+        for i in range(rate * seconds // batch):
+            for j in range(batch):
+                logging.info(f"Игнорируем команду от viewer_{i}_{j} — cooldown (ещё 1.23s)")
+            await asyncio.sleep(0.01)
+
+    t = asyncio.create_task(ticker())
+    await producer()
+    t.cancel()
+    lags.sort()
+    return {
+        "p50": lags[len(lags) // 2],
+        "p99": lags[int(len(lags) * 0.99)],
+        "max": lags[-1],
+    }
+
+
+def fmt(stats):
+    return " ".join(f"{k}={v * 1000:7.2f}ms" for k, v in stats.items())
+
+
+def main():
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    SlowRotatingFileHandler.slow_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+
+    print(f"{rate} строк/с, {seconds} с, диск {SlowRotatingFileHandler.slow_ms} мс/запись; лаг event loop:")
+    with tempfile.TemporaryDirectory() as d:
+        setup_direct(d)
+        print(f"  обработчики в loop: {fmt(asyncio.run(run_load(rate, seconds)))}")
+    with tempfile.TemporaryDirectory() as d:
+        listener = setup_queued(d)
+        stats = asyncio.run(run_load(rate, seconds))
+        listener.stop()
+        print(f"  очередь + поток:    {fmt(stats)}")
+    reset_root()
+
+
+if __name__ == "__main__":
+    main()
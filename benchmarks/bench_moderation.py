@@ -0,0 +1,76 @@
+# benchmarks/bench_moderation.py
+# Стоимость фильтра сообщений на одно сообщение при 1k, 10k и 100k запрещённых фраз:
+# автомат Ахо–Корасик (BannedList) против проверки каждой фразы через "in".
+# Время автомата зависит от длины сообщения, а не от размера списка.
+#
+# Запуск: python benchmarks/bench_moderation.py [сообщений] [размеры через запятую]
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moderation import BannedList, prepare_text, normalize_text
+
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщыьэюяabcdefghijklmnopqrstuvwxyz"
+CHAT = [
+    "привет чат", "как дела", "KEKW", "го катку", "стример топ", "PogChamp", "ахаха", "gg",
+    "а когда следующий стрим будет?", "!ник", "!кусь @someone", "лол что это было",
+    "кто-нибудь знает, что за музыка играет сейчас на фоне?",
+]
+NAIVE_LIMIT = 10000  # дольше — перебор слишком медленный для бенчмарка
+
+
+def make_patterns(n, rnd):
+    return [("".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(5, 14))), "bench.txt", "delete")
+            for _ in range(n)]
+
+
+def make_messages(n, rnd, patterns):
+    messages = []
+    for i in range(n):
+        text = rnd.choice(CHAT)
+        if i % 100 == 0:
+            # каждое сотое — с запрещённой фразой
+            text = f"{text} {rnd.choice(patterns)[0]}"
+        messages.append(text)
+    return messages
+
+
+def bench(fn, messages):
+    t0 = time.perf_counter()
+    hits = sum(1 for m in messages if fn(m))
+    return (time.perf_counter() - t0) / len(messages) * 1e6, hits
+
+
+def main():
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sizes = [int(x) for x in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1000, 10000, 100000]
+    rnd = random.Random(1)
+
+    print(f"сообщений: {n_messages}")
+    for size in sizes:
+        patterns = make_patterns(size, rnd)
+        messages = make_messages(n_messages, rnd, patterns)
+
+        t0 = time.perf_counter()
+        banned = BannedList(patterns)
+        build = time.perf_counter() - t0
+        ac_us, ac_hits = bench(lambda m: banned.match(m, prepare_text(m)), messages)
+        line = f"фраз {size:7d}: сборка {build:6.2f}s, автомат {ac_us:6.2f} us/сообщение ({ac_hits} совпадений)"
+
+        if size <= NAIVE_LIMIT:
+            phrases = [normalize_text(p[0]) for p in patterns]
+
+            def naive(m):
+                text = normalize_text(m)
+                return any(p in text for p in phrases)
+
+            naive_us, _ = bench(naive, messages[:2000])
+            line += f", перебор {naive_us:8.1f} us/сообщение"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_sharding.py
+# Масштабирование режима --workers: одна и та же нагрузка (спам командами по многим каналам)
+# делится между 1, 2, 4 ... процессами бота с общим SharedStore (SQLite WAL).
+# Каждый процесс — настоящий Bot с CHANNELS из своей доли каналов, фейковыми каналами
+# и FakeHelix из loadgen.py; сообщения подаются без пауз, не больше CONCURRENCY одновременно.
+# Пропускная способность должна расти почти линейно, пока процессов не больше ядер.
+#
+# Запуск: python benchmarks/bench_sharding.py [каналов] [сообщений_на_канал] [макс_процессов]
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import logging
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import loadgen
+
+CONCURRENCY = 256
+COMMAND_SHARE = 0.9
+
+
+def worker(channels, per_channel, store_path, seed, results):
+    workdir = loadgen.prepare_workdir()
+    os.environ["CHANNELS"] = ",".join(channels)
+    os.environ["SHARED_STORE"] = store_path
+    import bot as bot_module
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    async def run():
+        bot = bot_module.Bot()
+        bot.helix = loadgen.make_fake_helix(0.005)
+        bot.helix.store = bot.store
+
+        async def get_context(message, cls=None):
+            return loadgen.FakeContext(message, bot)
+
+        async def handle_commands(message):
+            return None
+
+        bot.get_context = get_context
+        bot.handle_commands = handle_commands
+        fake = {login: loadgen.FakeChannel(login) for login in channels}
+        for ch in fake.values():
+            bot.get_sender(ch).bucket.configure(10 ** 9)
+
+        rng = random.Random(seed)
+        commands = [c for c, _ in loadgen.COMMAND_MIX]
+        weights = [w for _, w in loadgen.COMMAND_MIX]
+        authors = [loadgen.FakeAuthor(f"viewer{i}", i) for i in range(2000)]
+        slots = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(msg):
+            try:
+                await bot.event_message(msg)
+            finally:
+                slots.release()
+
+        tasks = []
+        t0 = time.perf_counter()
+        for _ in range(per_channel):
+            for ch in fake.values():
+                author = authors[rng.randrange(len(authors))]
+                if rng.random() < COMMAND_SHARE:
+                    text = rng.choices(commands, weights)[0].format(other="someone")
+                else:
+                    text = "привет чат"
+                await slots.acquire()
+                tasks.append(asyncio.create_task(one(loadgen.FakeMessage(text, author, ch))))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+        await bot.event_close()
+        return elapsed
+
+    try:
+        results.put((len(channels) * per_channel, asyncio.run(run())))
+    finally:
+        os.chdir(loadgen.ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def measure(n_workers, channels, per_channel, store_path):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    shares = [channels[i::n_workers] for i in range(n_workers)]
+    procs = [ctx.Process(target=worker, args=(share, per_channel, store_path, i, results)) for i, share in enumerate(shares)]
+    for p in procs:
+        p.start()
+    done = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    messages = sum(n for n, _ in done)
+    # процессы стартуют не одновременно — считаем по самому медленному
+    return messages, max(t for _, t in done)
+
+
+def main():
+    n_channels = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_channel = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+
+    channels = [f"chan{i}" for i in range(n_channels)]
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    print(f"каналов: {n_channels}, сообщений на канал: {per_channel}, ядер: {os.cpu_count()}")
+    base = None
+    for n in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            messages, elapsed = measure(n, channels, per_channel, os.path.join(tmp, "shared.sqlite3"))
+        rate = messages / elapsed
+        base = base or rate
+        print(f"воркеров {n:3d}: {rate:9.0f} msg/s  x{rate / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# benchmarks/loadgen.py
+# Нагрузочный прогон конвейера сообщений: Bot.event_message -> cooldowns -> run_custom_command
+# -> очередь отправки, плюс счётчик и цикл авто-сообщений. Всё в одном процессе и без сети:
+# канал, автор, контекст и Helix подменены фейками (FakeHelix отвечает заготовками с задержкой).
+#
+# Бот запускается во временной папке с копией commands/, auto_messages/, banned_words/ и конфигов,
+# поэтому score.json, состояние авто-сообщений и логи репозитория не трогаются.
+#
+# Сценарии: idle (тихий чат), spam (спам командами от многих зрителей),
+# raid (всплеск новых зрителей), long (долгая сессия — рост памяти).
+# Отчёт: сообщений/с, p50/p99 задержки команд, лаг event loop, рост памяти (RSS и объекты gc).
+#
+# Запуск:
+#   python benchmarks/loadgen.py                      # все сценарии
+#   python benchmarks/loadgen.py spam raid --scale 0.5
+#   python benchmarks/loadgen.py --replay chat.txt --rate 200   # строки "ник<TAB>сообщение"
+#   --twitch-limits — реальные лимиты отправки Twitch (по умолчанию отправка не ограничена,
+#   чтобы мерить обработку, а не очередь)
+import os
+import gc
+import sys
+import time
+import shutil
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHANNEL = "loadgen"
+
+# доля каждой команды в командных сообщениях
+COMMAND_MIX = [
+    ("!ping", 20),
+    ("!ник", 20),
+    ("!кусь", 15),
+    ("!кусь @{other}", 10),
+    ("!цель", 10),
+    ("!drops", 10),
+    ("!follow", 5),
+    ("!панти", 5),
+    ("!unknown", 5),
+]
+CHAT_WORDS = ["привет", "как дела", "KEKW", "лол", "го катку", "стример топ", "PogChamp", "ахаха", "gg"]
+
+# name -> параметры; фазы: (секунд, сообщений/с, доля команд, новых зрителей за фазу)
+SCENARIOS = {
+    "idle": {"users": 50, "phases": [(10, 2, 0.05, 0)], "auto_interval": 3},
+    "spam": {"users": 5000, "phases": [(10, 500, 0.9, 0)], "auto_interval": 5},
+    "raid": {"users": 100, "phases": [(3, 5, 0.1, 0), (3, 2000, 0.3, 3000), (4, 50, 0.2, 0)], "auto_interval": 5},
+    "long": {"users": 2000, "phases": [(60, 200, 0.3, 20000)], "auto_interval": 10},
+}
+
+
+# ========== фейки ==========
+class FakeChatter:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeChannel:
+    def __init__(self, name):
+        self.name = name
+        self.chatters = set()
+        self.sent = 0
+
+    async def send(self, content):
+        self.sent += 1
+
+
+class FakeAuthor:
+    __slots__ = ("name", "display_name", "id", "is_mod", "is_broadcaster", "mention")
+
+    def __init__(self, name, uid, is_mod=False):
+        self.name = name
+        self.display_name = name
+        self.id = str(uid)
+        self.is_mod = is_mod
+        self.is_broadcaster = False
+        self.mention = f"@{name}"
+
+
+class FakeMessage:
+    __slots__ = ("content", "author", "channel", "echo", "tags")
+
+    def __init__(self, content, author, channel):
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.echo = False
+        self.tags = {}
+
+
+class FakeContext:
+    def __init__(self, message, bot):
+        self.message = message
+        self.author = message.author
+        self.channel = message.channel
+        self.bot = bot
+
+    async def send(self, content):
+        await self.channel.send(content)
+
+
+def make_fake_helix(latency):
+    from helix import HelixClient
+
+    class FakeHelix(HelixClient):
+        """HelixClient без сети: кэш, single-flight и метрики настоящие, ответы — заготовки."""
+
+        async def ensure_token(self):
+            return "loadgen"
+
+        async def _request(self, method, endpoint, params, json, token):
+            await asyncio.sleep(latency)
+            params = params or {}
+            if endpoint == "users":
+                login = params.get("login", "")
+                return 200, {"data": [{"id": str(abs(hash(login)) % 10 ** 9), "login": login}]}
+            if endpoint == "channels":
+                return 200, {"data": [{"game_name": "STALCRAFT: X", "game_id": "1", "title": "loadgen"}]}
+            if endpoint == "games":
+                return 200, {"data": [{"id": "1", "name": params.get("name")}]}
+            if endpoint == "channels/followers":
+                user_id = params.get("user_id", "1")
+                return 200, {"data": [{"user_id": user_id, "followed_at": "2024-01-01T00:00:00Z"}]}
+            if endpoint.startswith("moderation/"):
+                return 204, {}
+            if endpoint == "streams":
+                return 200, {"data": [{"type": "live", "viewer_count": 100}]}
+            return 200, {"data": []}
+
+    return FakeHelix("loadgen", "loadgen")
+
+
+# ========== окружение бота ==========
+def prepare_workdir():
+    """Временная папка с копией того, что бот читает по относительным путям."""
+    workdir = tempfile.mkdtemp(prefix="loadgen-")
+    for d in ("commands", "auto_messages", "banned_words"):
+        shutil.copytree(os.path.join(ROOT, d), os.path.join(workdir, d))
+    for f in os.listdir(ROOT):
+        if f.endswith("_config.py") or f == "score.json":
+            shutil.copy(os.path.join(ROOT, f), workdir)
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    os.environ.update({
+        "TOKEN": "oauth:loadgen", "CHANNEL": CHANNEL, "USER_OAUTH": "loadgen",
+        "CLIENT_ID": "loadgen", "CLIENT_SECRET": "loadgen",
+    })
+    os.environ.pop("METRICS_PORT", None)
+    return workdir
+
+
+def make_bot(bot_module, args, auto_interval):
+    bot = bot_module.Bot()
+    channel = FakeChannel(CHANNEL)
+    bot.helix = make_fake_helix(args.helix_latency)
+
+    async def get_context(message, cls=None):
+        return FakeContext(message, bot)
+
+    async def handle_commands(message):
+        return None
+
+    bot.get_context = get_context
+    bot.handle_commands = handle_commands
+    bot._get_send_channel = lambda rt: channel
+
+    sender = bot.get_sender(channel)
+    if not args.twitch_limits:
+        sender.bucket.configure(10 ** 9)
+
+    rt = bot.runtime_for(channel)
+    bot.load_auto_messages_config(rt)
+    for am in rt.auto_messages:
+        am["interval"] = auto_interval
+    rt.stream_online = True
+    rt.state.live = True
+    return bot, rt, channel
+
+
+# ========== замеры ==========
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def lag_sampler(samples, interval=0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - t0 - interval))
+
+
+# ========== генерация трафика ==========
+def scenario_stream(spec, rng):
+    """Генератор (пауза до сообщения, ник, текст) по фазам сценария."""
+    users = [f"viewer{i}" for i in range(spec["users"])]
+    commands = [c for c, _ in COMMAND_MIX]
+    weights = [w for _, w in COMMAND_MIX]
+    for seconds, rate, command_share, newcomers in spec["phases"]:
+        total = max(1, int(seconds * rate))
+        first_new = len(users)
+        users.extend(f"raider{first_new + i}" for i in range(newcomers))
+        for i in range(total):
+            # новые зрители заходят равномерно по фазе
+            visible = first_new + newcomers * (i + 1) // total if newcomers else len(users)
+            user = users[rng.randrange(visible)]
+            if rng.random() < command_share:
+                text = rng.choices(commands, weights)[0].format(other=users[rng.randrange(visible)])
+            else:
+                text = " ".join(rng.choices(CHAT_WORDS, k=rng.randint(1, 6)))
+            yield 1.0 / rate, user, text
+
+
+def replay_stream(path, rate):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            user, _, text = line.partition("\t")
+            if not text:
+                user, text = "replay", user
+            yield 1.0 / rate, user.strip().lower(), text
+
+
+async def drive(bot, channel, stream, args):
+    """Подаёт сообщения с заданным темпом; каждое — отдельная задача, как у twitchio."""
+    loop = asyncio.get_running_loop()
+    authors = {}
+    command_latency = []
+    chat_latency = []
+    pending = set()
+
+    async def one(msg, is_command):
+        t0 = time.perf_counter()
+        await bot.event_message(msg)
+        (command_latency if is_command else chat_latency).append(time.perf_counter() - t0)
+
+    start = loop.time()
+    due = start
+    sent = 0
+    for pause, user, text in stream:
+        due += pause * args.scale
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        author = authors.get(user)
+        if author is None:
+            author = authors[user] = FakeAuthor(user, len(authors) + 1, is_mod=user.endswith("7"))
+            channel.chatters.add(FakeChatter(user))
+        task = asyncio.create_task(one(FakeMessage(text, author, channel), text.startswith("!")))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        sent += 1
+    generated = loop.time() - start
+    if pending:
+        await asyncio.wait(pending)
+    return sent, generated, loop.time() - start, command_latency, chat_latency
+
+
+async def run_scenario(bot_module, name, args):
+    rng = random.Random(args.seed)
+    if name == "replay":
+        spec = {"auto_interval": 5}
+        stream = replay_stream(args.replay, args.rate)
+    else:
+        spec = SCENARIOS[name]
+        stream = scenario_stream(spec, rng)
+
+    bot, rt, channel = make_bot(bot_module, args, spec["auto_interval"])
+    lag = []
+    sampler = asyncio.create_task(lag_sampler(lag))
+    auto_loop = asyncio.create_task(bot._auto_message_loop(rt))
+
+    gc.collect()
+    rss0, objects0 = rss_bytes(), len(gc.get_objects())
+    sent, generated, elapsed, cmd_lat, chat_lat = await drive(bot, channel, stream, args)
+    gc.collect()
+    rss1, objects1 = rss_bytes(), len(gc.get_objects())
+
+    for task in (sampler, auto_loop):
+        task.cancel()
+    await asyncio.gather(sampler, auto_loop, return_exceptions=True)
+    await bot.event_close()
+
+    sender = bot.get_sender(channel).stats()
+    cooldowns = rt.cooldowns.stats()
+    print(f"--- {name} ---")
+    print(f"сообщений: {sent} за {elapsed:.2f}s ({sent / elapsed:.0f} msg/s, генерация {generated:.2f}s)")
+    print(
+        f"команды: {len(cmd_lat)}  p50 {percentile(cmd_lat, 0.5) * 1e3:.2f} ms"
+        f"  p99 {percentile(cmd_lat, 0.99) * 1e3:.2f} ms  max {max(cmd_lat, default=0) * 1e3:.2f} ms"
+    )
+    print(f"чат: {len(chat_lat)}  p50 {percentile(chat_lat, 0.5) * 1e6:.0f} us  p99 {percentile(chat_lat, 0.99) * 1e6:.0f} us")
+    print(f"лаг loop: p50 {percentile(lag, 0.5) * 1e3:.2f} ms  p99 {percentile(lag, 0.99) * 1e3:.2f} ms  max {max(lag, default=0) * 1e3:.2f} ms")
+    print(
+        f"отправка: {sender['sent']} отправлено, {sender['dropped']} выброшено, {sender['errors']} ошибок,"
+        f" ожидание avg {sender['wait_avg'] * 1e3:.1f} ms; cooldown: {cooldowns['rejected']} отклонено"
+    )
+    print(f"авто-сообщений за прогон: {sum(1 for am in rt.auto_messages if am['last_sent'])} из {len(rt.auto_messages)}")
+    print(f"память: RSS {(rss1 - rss0) / 2 ** 20:+.1f} MiB, объектов gc {objects1 - objects0:+d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон Bot.event_message")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"из {list(SCENARIOS)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель пауз (0.5 — вдвое быстрее)")
+    parser.add_argument("--replay", help="файл с чатом: строки 'ник<TAB>сообщение'")
+    parser.add_argument("--rate", type=float, default=100, help="сообщений/с для --replay")
+    parser.add_argument("--helix-latency", type=float, default=0.05, help="задержка FakeHelix, секунд")
+    parser.add_argument("--twitch-limits", action="store_true", help="реальные лимиты отправки Twitch")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="не глушить логи бота в консоли")
+    args = parser.parse_args()
+
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+    workdir = prepare_workdir()
+    try:
+        import bot as bot_module
+        from log_setup import setup_logging
+
+        # логи идут как в бою (очередь + файл), только консоль без INFO, чтобы не засорять отчёт
+        listener = setup_logging(bot_module.LOGS_DIR)
+        if not args.verbose:
+            for handler in listener.handlers:
+                if type(handler) is logging.StreamHandler:
+                    handler.setLevel(logging.WARNING)
+        names = ["replay"] if args.replay else args.scenarios
+        for name in names:
+            asyncio.run(run_scenario(bot_module, name, args))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,212 +3,600 @@ import os
 import time
 import asyncio
 import logging
-import importlib.util
-from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 from twitchio.ext import commands
-import aiohttp
 import inspect
-import json
+
+from command_registry import CommandRegistry, COMMAND_SUFFIXES, command_name
+from command_executor import CommandExecutor, CommandRejected
+from file_watcher import DirectoryWatcher
+from helix import HelixClient
+from eventsub import EventSubClient
+from followers import parse_time
+from moderation import MessageFilter, BannedList, ACTIONS
+from chat_archive import ChatArchive, ARCHIVE_DIR
+from channel_state import refresh_states
+from auto_scheduler import compile_conditions, skip_reason, CONDITION_RECHECK
+from channel_runtime import ChannelRuntime
+from shared_store import SharedStore
+from log_setup import setup_logging
+from metrics import (
+    REGISTRY, COMMAND_CALLS, COMMAND_ERRORS, COMMAND_LATENCY, AUTO_MESSAGES_SENT, COOLDOWN_REJECTIONS,
+    MODERATION_ACTIONS, monitor_loop_lag, start_metrics_server, timed,
+)
+from chat_sender import (
+    ChatSender, QueuedChannel, QueuedContext, TokenBucket, RATE_LIMIT_USER,
+    PRIORITY_REPLY, PRIORITY_ANNOUNCE, PRIORITY_AUTO,
+)
 
 # ========== Настройки ==========
 load_dotenv()
 TOKEN = os.getenv("TOKEN")
 CHANNEL = os.getenv("CHANNEL")
+# CHANNELS=chan1,chan2,... — несколько каналов в одном процессе; первый — основной.
+# Без CHANNELS бот работает на одном CHANNEL, как раньше.
+CHANNELS = [c.strip().lower() for c in (os.getenv("CHANNELS") or CHANNEL or "").split(",") if c.strip()]
+if CHANNELS:
+    CHANNEL = CHANNELS[0]
 CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+USER_OAUTH = os.getenv("USER_OAUTH")  # нужен для EventSub WebSocket
 
 COMMANDS_DIR = "commands"
 AUTOMSG_DIR = "auto_messages"
+BANNED_WORDS_DIR = "banned_words"  # списки фильтра сообщений (moderation_config.py)
 LOGS_DIR = "logs"
-STATE_FILE = "auto_messages_state.json"
 
 COMMAND_COOLDOWN = 5  # секунд
 
+# режим --workers: процесс-воркер получает свои каналы из общего хранилища (см. supervisor.py)
+WORKER_ID = os.getenv("WORKER_ID")
+SHARED_STORE = os.getenv("SHARED_STORE")
+WORKER_POLL = 2  # секунд: heartbeat и проверка назначенных каналов
+
+# METRICS_PORT=9108 — метрики в формате Prometheus на http://127.0.0.1:9108/metrics
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+# опрос helix/streams, когда EventSub недоступен: интервал растёт, пока статус не меняется;
+# все каналы проверяются одним запросом на каждые HELIX_BATCH логинов
+HELIX_BATCH = 100
+STREAM_POLL_MIN = 15  # секунд
+STREAM_POLL_MAX = 60
+STREAM_RECONCILE = 15 * 60  # при работающем EventSub — только редкая сверка
+
+# обновление игры/названия канала (при работающем EventSub приходят channel.update)
+CHANNEL_STATE_REFRESH = 60  # секунд
+CHANNEL_STATE_RECONCILE = 10 * 60
+
+# архив чата (для !lastseen и поиска: python chat_archive.py search канал зритель); CHAT_ARCHIVE=0 — выключить
+CHAT_ARCHIVE = os.getenv("CHAT_ARCHIVE", "1") != "0"
+
+# фолловеры каналов (для !follow): полная сверка раз в сутки, между ними — channel.follow из EventSub
+FOLLOWERS_POLL = 60  # секунд: проверка, не пора ли сверять, и сохранение новых follow
+
 # ========== Логи ==========
-os.makedirs(LOGS_DIR, exist_ok=True)
-log_file = os.path.join(LOGS_DIR, "bot.log")
-handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[handler, logging.StreamHandler()]
-)
+# файл и консоль пишутся в фоновом потоке; LOG_JSON=1 — файл в формате JSON
+# (у каждого воркера --workers свой файл: ротация одного файла из нескольких процессов ломается).
+# Вызывается только из __main__: дочерние процессы пула команд (spawn) импортируют bot.py
+# заново как __mp_main__ и не должны открывать свой RotatingFileHandler на тот же файл.
+def init_logging():
+    return setup_logging(
+        LOGS_DIR,
+        json_output=os.getenv("LOG_JSON") == "1",
+        filename=f"bot-worker{WORKER_ID}.log" if WORKER_ID is not None else "bot.log",
+    )
 
-    # ---------- загрузка сохраения ----------
-def load_auto_messages_state():
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-    
-    # ---------- сохранение ----------
-def save_auto_messages_state(state):
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f)
-    except Exception:
-        logging.exception("Не удалось сохранить состояние авто-сообщений")
 
 # ========== Helix helpers (aiohttp) ==========
-async def get_app_access_token(session):
+async def helix_streams_live(helix, logins, viewers=None):
     """
-    Получает App Access Token (client_credentials).
-    Возвращает (token, expires_in) или (None, 0) при ошибке.
+    Статус стрима для нескольких каналов: запросы helix/streams по HELIX_BATCH логинов.
+    Возвращает {login: True/False}; логинов из неудавшихся запросов в ответе нет.
+    viewers (dict) заполняется числом зрителей: login -> viewer_count (офлайн — 0).
     """
-    url = "https://id.twitch.tv/oauth2/token"
-    data = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
-    try:
-        async with session.post(url, data=data) as resp:
-            text = await resp.text()
-            if resp.status != 200:
-                logging.error(f"Ошибка получения App Token: HTTP {resp.status} — {text}")
-                return None, 0
-            js = await resp.json()
-            token = js.get("access_token")
-            expires = int(js.get("expires_in", 0))
-            logging.info("Получен App Access Token")
-            return token, expires
-    except Exception as e:
-        logging.exception(f"Исключение при запросе App Token: {e}")
-        return None, 0
-
-
-async def helix_is_stream_live(session, app_token, channel_name):
+    result = {}
+    for i in range(0, len(logins), HELIX_BATCH):
+        chunk = logins[i:i + HELIX_BATCH]
+        params = [("user_login", login) for login in chunk] + [("first", str(HELIX_BATCH))]
+        status, js = await helix.request("GET", "streams", params=params)
+        if status == 401:
+            logging.warning("Helix 401: токен недействителен или нет прав")
+            continue
+        if status == 0 or status >= 400:
+            logging.error(f"Helix запрос streams вернул HTTP {status}")
+            continue
+        live = {s.get("user_login", "").lower(): s.get("viewer_count", 0) for s in js.get("data", [])}
+        for login in chunk:
+            result[login] = login in live
+            if viewers is not None:
+                viewers[login] = live.get(login, 0)
+    return result
+
+
+async def helix_is_stream_live(helix, channel_name):
     """
     Возвращает True/False или None при ошибке.
     """
-    url = "https://api.twitch.tv/helix/streams"
-    headers = {"Client-ID": CLIENT_ID, "Authorization": f"Bearer {app_token}"}
-    params = {"user_login": channel_name}
-    try:
-        async with session.get(url, headers=headers, params=params) as resp:
-            text = await resp.text()
-            if resp.status == 401:
-                logging.warning(f"Helix 401: токен недействителен или нет прав: {text}")
-                return None
-            if resp.status >= 400:
-                logging.error(f"Helix запрос вернул HTTP {resp.status}: {text}")
-                return None
-            js = await resp.json()
-            data = js.get("data", [])
-            return len(data) > 0
-    except Exception as e:
-        logging.exception(f"Ошибка запроса Helix streams: {e}")
-        return None
+    result = await helix_streams_live(helix, [channel_name.lower()])
+    return result.get(channel_name.lower())
 
 
 # ========== Бот ==========
 class Bot(commands.Bot):
     def __init__(self):
-        if not TOKEN or not CHANNEL:
-            logging.error("TOKEN или CHANNEL не установлены в .env — бот не запустится.")
+        if not TOKEN or not CHANNELS:
+            logging.error("TOKEN или CHANNEL/CHANNELS не установлены в .env — бот не запустится.")
             raise SystemExit("TOKEN или CHANNEL отсутствуют")
 
-        super().__init__(token=TOKEN, prefix="!", initial_channels=[CHANNEL])
+        # воркер заходит в каналы по мере назначения супервизором
+        self.worker_id = int(WORKER_ID) if WORKER_ID is not None else None
+        initial = [] if self.worker_id is not None else list(CHANNELS)
+        super().__init__(token=TOKEN, prefix="!", initial_channels=initial)
+
+        # общее для процессов --workers: токен, кэш Helix, счёт, распределение каналов
+        self.store = SharedStore(SHARED_STORE) if SHARED_STORE else None
+
+        # состояние каждого канала: live/игра, авто-сообщения, счёт, cooldowns, свои команды
+        self.channels = {}
+        self._channel_tasks = {}  # login -> задача авто-сообщений
+        self._channel_watchers = {}  # login -> DirectoryWatcher своих команд
 
         # команды
         self.custom_command_files = {}
         self._last_command_keys = set()
-
-        # авто-сообщения (загрузится через конфиг)
-        self.auto_messages = []
-
-        # Twitch app token cache
-        self.app_token = None
-        self.app_token_expire_at = 0  # epoch
-
-        # session создаём в event_ready (чтобы избежать RuntimeError)
-        self.session = None
+        self.command_registry = CommandRegistry("commands")
+        self.command_aliases = {}
+        # дедлайны, лимит одновременных вызовов, пулы для синхронных и CPU_BOUND команд
+        self.executor = CommandExecutor()
+        self.auto_message_registry = CommandRegistry("auto_messages")
+        self._watchers = []
+        self._background_tasks = []
+
+        # общий Helix клиент: пул соединений + один App Access Token на процесс
+        # (session создаётся в event_ready, когда уже есть running loop)
+        self.helix = HelixClient(CLIENT_ID, CLIENT_SECRET, store=self.store)
 
         # stream state
-        self.stream_online = False
-        self.last_stream_state = None
-
-        # cooldowns
-        self.cooldowns = {}  # username -> timestamp
-
-        # main channel fallback (заполняется при первом сообщении)
-        self.main_channel = None
+        self.eventsub = None
+        self._stream_poll_wakeup = asyncio.Event()
+        self._channel_state_wakeup = asyncio.Event()
+
+        # исходящие сообщения: своя очередь с лимитом Twitch на каждый канал
+        self.chat_senders = {}  # channel name -> ChatSender
+        # лимит не-модератора Twitch считает на аккаунт — один bucket на все такие каналы
+        self.chat_account_bucket = TokenBucket(RATE_LIMIT_USER)
+
+        # cooldowns: общий на зрителя + настраиваемые на команду (commands_config.py)
+        self.command_cooldowns = {}
+        self.load_commands_config()
+
+        # фильтр сообщений: запрещённые фразы и флуд (moderation_config.py)
+        self.message_filter = None
+        self.moderation = {}
+        self._banned_reload = None
+        self._moderation_tasks = set()
+        self.load_moderation_config()
+
+        # архив чата: запись пачками в фоновом потоке; у воркеров --workers свой подкаталог
+        self.archive = None
+        if CHAT_ARCHIVE:
+            directory = ARCHIVE_DIR if self.worker_id is None else os.path.join(ARCHIVE_DIR, f"worker{self.worker_id}")
+            self.archive = ChatArchive(directory)
+
+        # метрики: счётчики и гистограммы пишутся по месту, состояние очередей и кэша — при запросе
+        self._metrics_server = None
+        REGISTRY.gauge(
+            "bot_chat_queue_depth", "Сообщений в очереди отправки", ["channel"],
+            lambda: [((name,), s.depth) for name, s in self.chat_senders.items()],
+        )
+        REGISTRY.gauge(
+            "bot_chat_messages", "Итоги очереди отправки", ["channel", "result"],
+            lambda: [((name, key), s.stats()[key]) for name, s in self.chat_senders.items()
+                     for key in ("sent", "dropped", "errors")],
+        )
+        REGISTRY.gauge(
+            "bot_chatters_present", "Зрителей в индексе присутствия", ["channel"],
+            lambda: [((login,), len(rt.presence)) for login, rt in self.channels.items()],
+        )
+        # статистика чата за стрим: топ команд ограничен TOP_K, поэтому меток немного
+        REGISTRY.gauge(
+            "bot_chat_stream_stats", "Статистика чата за стрим", ["channel", "stat"],
+            lambda: [((login, key), value) for login, rt in self.channels.items()
+                     for key, value in (("messages", rt.analytics.messages),
+                                        ("per_minute", rt.analytics.per_minute()),
+                                        ("unique_chatters", rt.analytics.uniques.count()))],
+        )
+        REGISTRY.gauge(
+            "bot_chat_top_commands", "Самые частые команды за стрим (оценка Count-Min)", ["channel", "command"],
+            lambda: [((login, name), count) for login, rt in self.channels.items()
+                     for name, count in rt.analytics.commands.top()],
+        )
+        REGISTRY.gauge(
+            "bot_chat_archive", "Архив чата: записано, потеряно и ждёт записи", ["result"],
+            lambda: [((key,), value) for key, value in self.archive.stats().items()] if self.archive else [],
+        )
+        REGISTRY.gauge(
+            "bot_moderation_patterns", "Фраз и выражений в фильтре", [],
+            lambda: [((), len(self.message_filter.banned) if self.message_filter else 0)],
+        )
+        REGISTRY.gauge(
+            "bot_commands_running", "Команды, выполняющиеся сейчас", [],
+            lambda: [((), self.executor.stats()["running"])],
+        )
+        REGISTRY.gauge(
+            "bot_helix_cache", "Кэш ответов Helix", ["stat"],
+            lambda: [((key,), value) for key, value in self.helix.cache_stats().items()],
+        )
 
         # ensure dirs, load commands/auto messages metadata
         os.makedirs(COMMANDS_DIR, exist_ok=True)
         os.makedirs(AUTOMSG_DIR, exist_ok=True)
         self.scan_command_files()
+        for login in initial:
+            self.channels[login] = self._make_runtime(login)
+
+    # ---------- каналы ----------
+    @property
+    def primary(self):
+        # основной канал, а у воркера без него — первый из своих
+        return self.channels.get(CHANNEL) or next(iter(self.channels.values()), None)
+
+    def runtime_for(self, channel):
+        """ChannelRuntime по каналу twitchio (или логину); неизвестный канал — основной."""
+        name = channel if isinstance(channel, str) else getattr(channel, "name", None)
+        return self.channels.get((name or "").lower()) or self.primary
+
+    def presence(self, channel):
+        """PresenceIndex канала; при первом обращении дополняется списком NAMES из кэша twitchio."""
+        rt = self.runtime_for(channel)
+        index = rt.presence
+        if not index.seeded:
+            chan = rt.channel or self.get_channel(rt.login)
+            chatters = getattr(chan, "chatters", None)
+            if chatters:
+                index.seed(c.name for c in chatters if c.name and c.name.lower() != (self.nick or "").lower())
+        return index
+
+    async def broadcaster_id(self, rt):
+        """Twitch id канала (запоминается в ChannelState) или None."""
+        if not rt.state.broadcaster_id:
+            user = await self.helix.get_user(rt.login)
+            if user:
+                rt.state.broadcaster_id = user["id"]
+        return rt.state.broadcaster_id
+
+    def _make_runtime(self, login):
+        rt = ChannelRuntime(login, primary=(login == CHANNEL), user_cooldown=COMMAND_COOLDOWN, store=self.store)
+        rt.cooldowns.configure(self.command_cooldowns)
+        rt.scan_overrides()
+        rt.rebuild_commands(self.custom_command_files, self.command_aliases)
+        return rt
+
+    def _start_channel(self, rt):
+        """Авто-сообщения и слежение за своими командами канала."""
+        self.load_auto_messages_config(rt)
+        rt.load_auto_messages_state()
+        self._channel_tasks[rt.login] = asyncio.create_task(self._auto_message_loop(rt))
+        if os.path.isdir(rt.commands_dir):
+            watcher = DirectoryWatcher(
+                rt.commands_dir, lambda names, rt=rt: self._on_overrides_changed(rt, names), COMMAND_SUFFIXES
+            )
+            watcher.start()
+            self._channel_watchers[rt.login] = watcher
+
+    async def add_channel(self, login):
+        if login in self.channels:
+            return
+        # конструктор читает диск (followers.bin, свои команды) и пишет в SQLite (score_init) —
+        # на заблокированной базе это до BUSY_TIMEOUT_MS, поэтому не в event loop
+        rt = await asyncio.to_thread(self._make_runtime, login)
+        if login in self.channels:
+            return
+        self.channels[login] = rt
+        self._start_channel(rt)
+        await self.join_channels([login])
+        logging.info(f"Канал {login} подключён")
+        # статус стрима и игра нового канала — не дожидаясь следующего опроса
+        self._stream_poll_wakeup.set()
+        self._channel_state_wakeup.set()
+
+    async def remove_channel(self, login):
+        rt = self.channels.pop(login, None)
+        if rt is None:
+            return
+        task = self._channel_tasks.pop(login, None)
+        if task:
+            task.cancel()
+        watcher = self._channel_watchers.pop(login, None)
+        if watcher:
+            watcher.stop()
+        sender = self.chat_senders.pop(login, None)
+        if sender:
+            sender.stop()
+        await rt.score_store.flush()
+        try:
+            await self.part_channels([login])
+        except Exception as e:
+            logging.warning(f"Не удалось выйти из канала {login}: {e}")
+        logging.info(f"Канал {login} отключён")
+
+    # основной канал — для команд и авто-сообщений, написанных под один канал
+    @property
+    def channel_state(self):
+        return self.primary.state
+
+    @property
+    def score_store(self):
+        return self.primary.score_store
 
     # ---------- commands scanning ----------
     def scan_command_files(self):
         new = {}
-        for fname in os.listdir(COMMANDS_DIR):
-            if fname.endswith(".py"):
-                name = fname[:-3]
-                new[name] = os.path.join(COMMANDS_DIR, fname)
+        for fname in sorted(os.listdir(COMMANDS_DIR)):
+            name = command_name(fname)
+            if name is None:
+                continue
+            if name in new:
+                logging.warning(f"Команда {name} описана дважды, {fname} пропущен")
+                continue
+            new[name] = os.path.join(COMMANDS_DIR, fname)
         new_keys = set(new.keys())
         if new_keys != self._last_command_keys:
             logging.info(f"Найдено кастомных команд: {sorted(list(new_keys))}")
             self._last_command_keys = new_keys
+            # удалённые файлы не держим в кэше модулей
+            for name, path in self.custom_command_files.items():
+                if name not in new:
+                    self.command_registry.forget(path)
         self.custom_command_files = new
+        self._rebuild_dispatchers()
+
+    def _rebuild_dispatchers(self):
+        for rt in self.channels.values():
+            rt.rebuild_commands(self.custom_command_files, self.command_aliases)
+
+    # ---------- load commands config ----------
+    def load_commands_config(self):
+        try:
+            import commands_config as cfg
+            self.command_cooldowns = getattr(cfg, "COMMAND_COOLDOWNS", {})
+            for rt in self.channels.values():
+                rt.cooldowns.configure(self.command_cooldowns)
+            self.command_aliases = getattr(cfg, "COMMAND_ALIASES", {})
+        except Exception as e:
+            logging.warning(f"commands_config не загружен: {e}")
+
+    # ---------- фильтр сообщений ----------
+    def load_moderation_config(self):
+        try:
+            import moderation_config as cfg
+        except Exception as e:
+            logging.warning(f"moderation_config не загружен: {e}")
+            return
+        if not getattr(cfg, "MODERATION_ENABLED", True):
+            logging.info("Фильтр сообщений выключен")
+            return
+        settings = {
+            "banned_action": getattr(cfg, "BANNED_ACTION", "delete"),
+            "list_actions": dict(getattr(cfg, "LIST_ACTIONS", {})),
+            "flood_action": getattr(cfg, "FLOOD_ACTION", "ignore"),
+            "timeout": int(getattr(cfg, "TIMEOUT_SECONDS", 60)),
+        }
+        for action in [settings["banned_action"], settings["flood_action"], *settings["list_actions"].values()]:
+            if action not in ACTIONS:
+                logging.error(f"moderation_config: неизвестное действие {action!r}, допустимы {ACTIONS}")
+                return
+        self.moderation = settings
+        self.message_filter = MessageFilter(
+            getattr(cfg, "FLOOD_MESSAGES", 0),
+            getattr(cfg, "FLOOD_WINDOW", 10),
+            settings["flood_action"],
+            exempt_mods=getattr(cfg, "EXEMPT_MODS", True),
+        )
+        os.makedirs(BANNED_WORDS_DIR, exist_ok=True)
+        self.message_filter.set_banned(self._load_banned_words())
+
+    def _load_banned_words(self):
+        banned = BannedList.from_dir(BANNED_WORDS_DIR, self.moderation["list_actions"], self.moderation["banned_action"])
+        logging.info(f"Фильтр сообщений: {len(banned)} фраз и выражений")
+        return banned
+
+    def _on_banned_words_changed(self, names):
+        # большой список собирается в потоке; до замены работает прежний
+        if self._banned_reload is None or self._banned_reload.done():
+            self._banned_reload = asyncio.create_task(self._reload_banned_words())
+
+    async def _reload_banned_words(self):
+        try:
+            self.message_filter.set_banned(await asyncio.to_thread(self._load_banned_words))
+        except Exception as e:
+            logging.exception(f"Списки фильтра не перезагружены: {e}")
+
+    async def _moderate(self, rt, message, action, reason):
+        """delete / timeout через Helix от имени владельца USER_OAUTH."""
+        if not USER_OAUTH:
+            logging.warning(f"Фильтр: {action} невозможен без USER_OAUTH", extra={"sample": 10})
+            return
+        moderator = await self.helix.get_token_user(USER_OAUTH)
+        broadcaster_id = await self.broadcaster_id(rt)
+        if not moderator or not broadcaster_id:
+            return
+        params = {"broadcaster_id": broadcaster_id, "moderator_id": moderator["id"]}
+        if action == "delete":
+            params["message_id"] = message.id
+            status, js = await self.helix.request("DELETE", "moderation/chat", params=params, token=USER_OAUTH)
+        else:
+            body = {"data": {"user_id": message.author.id, "duration": self.moderation["timeout"], "reason": reason[:500]}}
+            status, js = await self.helix.request("POST", "moderation/bans", params=params, json=body, token=USER_OAUTH)
+        if status not in (200, 204):
+            logging.warning(f"Фильтр: {action} для {message.author.name} не выполнен: HTTP {status} {js}")
 
     # ---------- load auto messages ----------
-    def load_auto_messages_config(self):
+    def load_auto_messages_config(self, rt):
         try:
             import auto_messages_config as cfg
             load = getattr(cfg, "load_auto_messages", None)
             if callable(load):
-                self.auto_messages = load()
+                rt.auto_messages = load(rt.login)
             else:
-                self.auto_messages = getattr(cfg, "AUTO_MESSAGES", [])
-                for am in self.auto_messages:
+                rt.auto_messages = [dict(am) for am in getattr(cfg, "AUTO_MESSAGES", [])]
+                for am in rt.auto_messages:
                     am.setdefault("last_sent", 0)
                     am.setdefault("counter", 0)
-            logging.info(f"Загружены авто-сообщения: {[a['file'] for a in self.auto_messages]}")
+            entries = []
+            for am in rt.auto_messages:
+                try:
+                    entries.append(compile_conditions(am))
+                except (TypeError, ValueError) as e:
+                    logging.error(f"Авто-сообщение {am.get('file')} пропущено: неверные условия ({e})")
+            rt.auto_messages = entries
+            logging.info(f"Загружены авто-сообщения {rt.login}: {[a['file'] for a in rt.auto_messages]}")
         except Exception as e:
             logging.warning(f"auto_messages_config не загружен: {e}")
-            self.auto_messages = []
+            rt.auto_messages = []
 
     # ---------- lifecycle ----------
     async def event_ready(self):
-        logging.info(f"Bot ready: {self.nick} -> {CHANNEL}")
+        if self.worker_id is not None:
+            logging.info(f"Bot ready: {self.nick}, воркер {self.worker_id}")
+        else:
+            logging.info(f"Bot ready: {self.nick} -> {', '.join(CHANNELS)}")
 
         # создаём session здесь — уже есть running loop
-        if self.session is None or getattr(self.session, "closed", True):
-            self.session = aiohttp.ClientSession()
+        self.helix.get_session()
 
-        # загрузим авто-сообщения из конфига
-        self.load_auto_messages_config()
+        # event_ready повторяется после каждого переподключения к IRC —
+        # конфиг, состояние и фоновые задачи поднимаем только один раз
+        if self._background_tasks:
+            return
+
+        # горячая перезагрузка commands/ и auto_messages/
+        if not self._watchers:
+            self._watchers = [
+                DirectoryWatcher(COMMANDS_DIR, self._on_commands_changed, COMMAND_SUFFIXES),
+                DirectoryWatcher(AUTOMSG_DIR, self._on_auto_messages_changed),
+            ]
+            if self.message_filter is not None:
+                self._watchers.append(DirectoryWatcher(BANNED_WORDS_DIR, self._on_banned_words_changed, (".txt",)))
+            for w in self._watchers:
+                w.start()
+
+        # авто-сообщения из конфига и сохранённое состояние — на каждый канал
+        for rt in self.channels.values():
+            self._start_channel(rt)
 
         # периодические задачи
-        asyncio.create_task(self._periodic_scan_commands())
-        asyncio.create_task(self._auto_message_loop())
-        asyncio.create_task(self._stream_status_loop())
-
-        self.auto_messages_state = load_auto_messages_state()
-        for am in self.auto_messages:
-            fname = am["file"]
-            if fname in self.auto_messages_state:
-                st = self.auto_messages_state[fname]
-                am["last_sent"] = st.get("last_sent", 0)
-                am["counter"] = st.get("counter", 0)
+        self._background_tasks = [
+            asyncio.create_task(self._stream_status_loop()),
+            asyncio.create_task(self._channel_state_loop()),
+            asyncio.create_task(self._eventsub_loop()),
+            asyncio.create_task(self._followers_loop()),
+            asyncio.create_task(monitor_loop_lag()),
+        ]
+        if self.worker_id is not None:
+            self._background_tasks.append(asyncio.create_task(self._worker_loop()))
+        if METRICS_PORT:
+            try:
+                # у воркеров порты METRICS_PORT, METRICS_PORT+1, ...
+                self._metrics_server = await start_metrics_server(int(METRICS_PORT) + (self.worker_id or 0))
+            except (OSError, ValueError) as e:
+                logging.error(f"Не удалось поднять метрики на порту {METRICS_PORT}: {e}")
 
     async def event_close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        for w in self._watchers + list(self._channel_watchers.values()):
+            w.stop()
+        self._watchers = []
+        self._channel_watchers = {}
+        for sender in self.chat_senders.values():
+            sender.stop()
+        if self._metrics_server:
+            self._metrics_server.close()
+            self._metrics_server = None
+        for rt in self.channels.values():
+            await rt.score_store.flush()
+            if rt.followers.dirty:
+                await rt.followers.save()
+        self.executor.shutdown()
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.stop)
+        await self.helix.close()
         logging.info("aiohttp.ClientSession закрыт")
 
-    async def _periodic_scan_commands(self):
+    # ---------- режим --workers ----------
+    async def _worker_loop(self):
+        """Heartbeat для супервизора и подстройка под назначенные этому воркеру каналы."""
         while True:
             try:
-                self.scan_command_files()
+                await asyncio.to_thread(self.store.heartbeat, self.worker_id)
+                assigned = set(await asyncio.to_thread(self.store.channels_of, self.worker_id))
+                for login in sorted(set(self.channels) - assigned):
+                    await self.remove_channel(login)
+                for login in sorted(assigned - set(self.channels)):
+                    await self.add_channel(login)
             except Exception as e:
-                logging.exception(f"Ошибка сканирования команд: {e}")
-            await asyncio.sleep(30)
+                logging.exception(f"Ошибка синхронизации каналов воркера: {e}")
+            await asyncio.sleep(WORKER_POLL)
+
+    # ---------- горячая перезагрузка ----------
+    def _on_commands_changed(self, names):
+        self.custom_command_files = self._apply_command_changes(self.custom_command_files, COMMANDS_DIR, names)
+        self._last_command_keys = set(self.custom_command_files.keys())
+        self._rebuild_dispatchers()
+
+    def _on_overrides_changed(self, rt, names):
+        rt.command_overrides = self._apply_command_changes(rt.command_overrides, rt.commands_dir, names)
+        rt.rebuild_commands(self.custom_command_files, self.command_aliases)
+
+    def _apply_command_changes(self, files, directory, names):
+        # загружаем и проверяем изменённые файлы заранее, а затем атомарно
+        # подменяем словарь команд; сломанная правка оставляет прежнюю версию
+        new = dict(files)
+        for fname in names:
+            name = command_name(fname)
+            if name is None:
+                continue
+            path = os.path.join(directory, fname)
+            if not os.path.exists(path):
+                if new.get(name) == path:
+                    del new[name]
+                    logging.info(f"Команда удалена: {name}")
+                self.command_registry.forget(path)
+                continue
+            if new.get(name, path) != path:
+                logging.warning(f"Команда {name} описана дважды, {fname} пропущен")
+                continue
+            try:
+                self.command_registry.load(name, path)
+            except Exception as e:
+                logging.error(f"Команда {name} не принята: {e}")
+                continue
+            if name not in new:
+                logging.info(f"Добавлена команда: {name}")
+            new[name] = path
+        return new
+
+    def _on_auto_messages_changed(self, names):
+        for fname in names:
+            path = os.path.join(AUTOMSG_DIR, fname)
+            if not os.path.exists(path):
+                self.auto_message_registry.forget(path)
+                continue
+            try:
+                self.auto_message_registry.load(fname[:-3], path)
+            except Exception as e:
+                logging.error(f"Авто-сообщение {fname} не принято: {e}")
+
+    # ---------- зрители ----------
+    async def event_join(self, channel, user):
+        rt = self.channels.get(channel.name.lower())
+        if rt is not None and user.name and user.name.lower() != (self.nick or "").lower():
+            rt.presence.join(user.name)
+
+    async def event_part(self, user):
+        channel = getattr(user, "channel", None)
+        rt = self.channels.get(channel.name.lower()) if channel else None
+        if rt is not None and user.name:
+            rt.presence.part(user.name)
 
     # ---------- messages ----------
     async def event_message(self, message):
@@ -216,12 +604,31 @@ class Bot(commands.Bot):
         if message.echo:
             return
 
-        # запомним main_channel (фолбэк для авто-писем)
-        if not self.main_channel:
-            try:
-                self.main_channel = message.channel
-            except Exception:
-                self.main_channel = None
+        # канал сообщения; запомним его объект (фолбэк для авто-писем)
+        rt = self.runtime_for(message.channel)
+        if rt is None:
+            return
+        if rt.channel is None:
+            rt.channel = message.channel
+
+        # в архив — всё, в том числе то, что отсеет фильтр
+        if self.archive is not None:
+            self.archive.append(rt.login, message.author.name.lower(), message.content or "")
+
+        # фильтр — до команд и учёта сообщения
+        if self.message_filter is not None:
+            verdict = self.message_filter.check(rt.login, message.author, message.content or "")
+            if verdict:
+                action, reason = verdict
+                MODERATION_ACTIONS.labels(action, "flood" if reason == "flood" else "banned").inc()
+                logging.info(f"Фильтр: {action} {message.author.name} в {rt.login} ({reason})", extra={"sample": 10})
+                if action != "ignore":
+                    task = asyncio.create_task(self._moderate(rt, message, action, reason))
+                    self._moderation_tasks.add(task)
+                    task.add_done_callback(self._moderation_tasks.discard)
+                return
+        rt.presence.touch(message.author.name)
+        rt.analytics.on_message(message.author.name.lower())
 
         # обработка команды (начинается с "!")
         content = (message.content or "").strip()
@@ -231,19 +638,23 @@ class Bot(commands.Bot):
             return
 
         # считаем сообщения для авто-сообщений (нужно для min_chat_messages)
-        for am in self.auto_messages:
-            am['counter'] = am.get('counter', 0) + 1
+        rt.auto_scheduler.on_chat_message()
 
         username = message.author.name.lower()
-        now = time.time()
-        last = self.cooldowns.get(username, 0)
-        if now - last < COMMAND_COOLDOWN:
-            logging.info(f"Игнорируем команду от {username} — cooldown ({now-last:.2f}s)")
+        token = rt.dispatcher.token(content)
+        cmd_name = rt.dispatcher.resolve(token)
+
+        # модераторы и стример cooldown не ждут
+        author = message.author
+        bypass = bool(getattr(author, "is_mod", False) or getattr(author, "is_broadcaster", False))
+        wait = rt.cooldowns.check(username, cmd_name or token, bypass)
+        if wait:
+            COOLDOWN_REJECTIONS.inc()
+            logging.info(f"Игнорируем команду от {username} — cooldown (ещё {wait:.2f}s)", extra={"sample": 10})
             return
-        self.cooldowns[username] = now
 
-        cmd_name = content.split()[0][1:]
-        if cmd_name in self.custom_command_files:
+        if cmd_name:
+            rt.analytics.on_command(cmd_name)
             await self.run_custom_command(cmd_name, message)
             return
 
@@ -252,213 +663,378 @@ class Bot(commands.Bot):
 
     # ---------- выполнение кастомной команды ----------
     async def run_custom_command(self, cmd_name, message):
-        path = self.custom_command_files.get(cmd_name)
+        COMMAND_CALLS.labels(cmd_name).inc()
+        with timed(COMMAND_LATENCY.labels(cmd_name)):
+            await self._execute_custom_command(cmd_name, message)
+
+    async def _execute_custom_command(self, cmd_name, message):
+        path = self.runtime_for(message.channel).command_files.get(cmd_name)
         if not path:
             logging.warning(f"Команда {cmd_name} не найдена (path пустой).")
             return
-        if not os.path.exists(path):
-            logging.warning(f"Файл команды {path} не найден.")
-            return
 
         try:
-            # Импортируем модуль динамически (чтобы сразу видеть изменения)
-            spec = importlib.util.spec_from_file_location(f"commands.{cmd_name}_{int(time.time())}", path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            # модуль берётся из кэша и перезагружается только при изменении файла
+            entry = self.command_registry.get(cmd_name, path)
+        except FileNotFoundError:
+            logging.warning(f"Файл команды {path} не найден.")
+            return
         except Exception as e:
+            COMMAND_ERRORS.labels(cmd_name).inc()
             logging.exception(f"Ошибка при загрузке команды {cmd_name}: {e}")
             try:
-                await message.channel.send(f"Ошибка загрузки команды {cmd_name}")
+                await self.send_message(message.channel, f"Ошибка загрузки команды {cmd_name}")
             except Exception:
                 pass
             return
 
-        func = getattr(module, "run", None)
+        func = entry.func
         if not func:
             logging.warning(f"В модуле {cmd_name} нет функции run")
             return
 
         # предпочитаем ctx (Context), но если команда написана иначе — пробуем message
         try:
-            ctx = await self.get_context(message)
-            if inspect.iscoroutinefunction(func):
-                await func(ctx)
-            else:
-                res = func(ctx)
-                if inspect.isawaitable(res):
-                    await res
+            ctx = QueuedContext(await self.get_context(message), self.get_sender(message.channel))
+            await self.executor.run(cmd_name, entry, ctx)
+        except CommandRejected:
+            logging.info(f"Команда {cmd_name} уже выполняется на пределе MAX_CONCURRENCY — пропускаем", extra={"sample": 10})
+        except asyncio.TimeoutError:
+            logging.warning(f"Команда {cmd_name} не уложилась в {self.executor.limits(entry)[0]}s и отменена")
         except TypeError:
             logging.info(f"run(ctx) не подошёл для {cmd_name}, пробуем run(message)")
             try:
-                if inspect.iscoroutinefunction(func):
-                    await func(message)
-                else:
-                    res = func(message)
-                    if inspect.isawaitable(res):
-                        await res
+                await self.executor.run(cmd_name, entry, message)
+            except (CommandRejected, asyncio.TimeoutError):
+                pass
             except Exception as e:
+                COMMAND_ERRORS.labels(cmd_name).inc()
                 logging.exception(f"Ошибка выполнения команды {cmd_name}: {e}")
                 try:
-                    await message.channel.send(f"Ошибка в команде {cmd_name}")
+                    await self.send_message(message.channel, f"Ошибка в команде {cmd_name}")
                 except Exception:
                     pass
         except Exception as e:
+            COMMAND_ERRORS.labels(cmd_name).inc()
             logging.exception(f"Ошибка выполнения команды {cmd_name}: {e}")
             try:
-                await message.channel.send(f"Ошибка в команде {cmd_name}: {e}")
+                await self.send_message(message.channel, f"Ошибка в команде {cmd_name}: {e}")
             except Exception:
                 pass
 
+    # ---------- исходящие сообщения ----------
+    def get_sender(self, channel):
+        name = (getattr(channel, "name", None) or CHANNEL).lower()
+        sender = self.chat_senders.get(name)
+        if sender is None:
+            # в своём канале бот — владелец, у него лимит модератора
+            own = name == (getattr(self, "nick", None) or "").lower()
+            sender = ChatSender(name, moderator=own, account=self.chat_account_bucket)
+            self.chat_senders[name] = sender
+        return sender
+
+    async def send_message(self, channel, text, priority=PRIORITY_REPLY):
+        """Отправка через очередь канала. True — отправлено, False — выброшено или ошибка."""
+        return await self.get_sender(channel).send(channel, text, priority)
+
+    async def event_userstate(self, user):
+        # USERSTATE приходит при входе в канал и после наших сообщений — отсюда знаем, модераторы ли мы
+        try:
+            channel = user.channel
+            is_mod = bool(getattr(user, "is_mod", False)) or channel.name.lower() == user.name.lower()
+            self.get_sender(channel).set_moderator(is_mod)
+        except Exception as e:
+            logging.debug(f"USERSTATE не разобран: {e}")
+
     # ---------- авто-сообщения ----------
-    def _get_send_channel(self):
+    def _get_send_channel(self, rt):
         try:
-            ch = self.get_channel(CHANNEL)
+            ch = self.get_channel(rt.login)
             if ch:
                 return ch
         except Exception:
             pass
-        try:
-            if getattr(self, "connected_channels", None):
-                if len(self.connected_channels) > 0:
-                    return self.connected_channels[0]
-        except Exception:
-            pass
-        return getattr(self, "main_channel", None)
+        return rt.channel
 
     # ---------- цикл ----------
-    async def _auto_message_loop(self):
-        if not self.auto_messages:
-            self.load_auto_messages_config()
+    async def _auto_message_loop(self, rt):
+        if not rt.auto_messages:
+            self.load_auto_messages_config(rt)
 
-        while True:
-            if not self.stream_online:
-                await asyncio.sleep(5)
-                continue
+        # спим ровно до ближайшего дедлайна / порога сообщений / старта стрима
+        rt.auto_scheduler.reset(rt.auto_messages)
+        rt.auto_scheduler.set_online(rt.stream_online)
 
+        while True:
+            due = await rt.auto_scheduler.wait_due()
             now = time.time()
-            for am in self.auto_messages:
+            for am in due:
+                # условия — по состоянию в памяти, до загрузки модуля; непрошедшая запись interval не тратит
+                reason = skip_reason(am, rt.state, rt.stream_online, rt.analytics, now)
+                if reason:
+                    logging.info(f"Авто-сообщение {am['file']} в {rt.login} отложено: {reason}", extra={"sample": 10})
+                    rt.auto_scheduler.defer(am, now + CONDITION_RECHECK)
+                    continue
                 try:
-                    interval = am.get("interval", 600)
-                    last_sent = am.get("last_sent", 0)
-                    min_chat = am.get("min_chat_messages", 0)
-                    counter = am.get("counter", 0)
-
-                    if now - last_sent >= interval and counter >= min_chat:
-                        chan = self._get_send_channel()
-                        if chan:
-                            p = os.path.join(AUTOMSG_DIR, am["file"])
-                            if os.path.exists(p):
-                                try:
-                                    spec = importlib.util.spec_from_file_location(
-                                        f"auto_msg_{os.path.splitext(am['file'])[0]}_{int(now)}",
-                                        p
-                                    )
-                                    module = importlib.util.module_from_spec(spec)
-                                    spec.loader.exec_module(module)
-
-                                    runfn = getattr(module, "run", None)
-                                    if runfn:
-                                        sig = inspect.signature(runfn)
-                                        params = len(sig.parameters)
-
-                                        if params >= 2:
-                                            res = runfn(chan, self)
-                                        elif params == 1:
-                                            res = runfn(chan)
-                                        else:
-                                            res = runfn()
-
-                                        if inspect.isawaitable(res):
-                                            await res
-
-                                        logging.info(f"Отправлено авто-сообщение {am['file']}")
-                                except Exception as e:
-                                    logging.exception(f"Ошибка при исполнении авто-сообщения {am['file']}: {e}")
-                            else:
-                                logging.warning(f"Авто-файл не найден: {p}")
-
-                        am["last_sent"] = now
-                        am["counter"] = 0
-
-                        # сохраняем состояние в JSON
-                        self.auto_messages_state[am["file"]] = {
-                            "last_sent": am["last_sent"],
-                            "counter": am["counter"]
-                        }
-                        save_auto_messages_state(self.auto_messages_state)
-
+                    await self._run_auto_message(rt, am)
                 except Exception as e:
                     logging.exception(f"Ошибка в обработке авто-сообщения {am.get('file')}: {e}")
 
-            await asyncio.sleep(5)
+                rt.auto_scheduler.mark_sent(am, now)
+
+                # сохраняем состояние в JSON
+                rt.save_auto_messages_state(am)
+
+    async def _run_auto_message(self, rt, am):
+        chan = self._get_send_channel(rt)
+        if not chan:
+            return
+        p = os.path.join(AUTOMSG_DIR, am["file"])
+        if not os.path.exists(p):
+            logging.warning(f"Авто-файл не найден: {p}")
+            return
+        try:
+            entry = self.auto_message_registry.get(os.path.splitext(am["file"])[0], p)
+
+            runfn = entry.func
+            # авто-сообщения уступают очередь ответам на команды
+            chan = QueuedChannel(chan, self.get_sender(chan), PRIORITY_AUTO)
+            if runfn:
+                sig = inspect.signature(runfn)
+                params = len(sig.parameters)
+
+                if params >= 2:
+                    res = runfn(chan, self)
+                elif params == 1:
+                    res = runfn(chan)
+                else:
+                    res = runfn()
+
+                if inspect.isawaitable(res):
+                    await res
+
+                AUTO_MESSAGES_SENT.labels(am["file"]).inc()
+                logging.info(f"Отправлено авто-сообщение {am['file']} в {rt.login}")
+        except Exception as e:
+            logging.exception(f"Ошибка при исполнении авто-сообщения {am['file']}: {e}")
 
     # ---------- проверка статуса стрима ----------
-    async def _ensure_app_token(self):
-        # создаём session, если потребуется (в безопасном месте — уже в async)
-        if self.session is None or getattr(self.session, "closed", True):
-            self.session = aiohttp.ClientSession()
+    @property
+    def session(self):
+        return self.helix.session
 
-        if not CLIENT_ID or not CLIENT_SECRET:
+    @property
+    def app_token(self):
+        return self.helix.app_token
+
+    async def _ensure_app_token(self):
+        if not self.helix.configured:
             logging.warning("CLIENT_ID/CLIENT_SECRET не заданы — проверка стрима отключена.")
             return False
+        return await self.helix.ensure_token() is not None
+
+    async def _set_stream_online(self, rt, live):
+        """Применяет статус стрима канала (из опроса или EventSub). Возвращает True, если статус сменился."""
+        changed = False
+        if live and not rt.stream_online:
+            rt.stream_online = True
+            changed = True
+            rt.analytics.reset()
+            logging.info(f"Стрим {rt.login} начался (детект).")
+            chan = self._get_send_channel(rt)
+            if chan:
+                try:
+                    await self.send_message(chan, "Теперь я тоже смотрю стрим!", PRIORITY_ANNOUNCE)
+                except Exception:
+                    pass
 
-        now = time.time()
-        if self.app_token and now < self.app_token_expire_at - 30:
-            return True
+        elif not live and rt.stream_online:
+            rt.stream_online = False
+            changed = True
+            logging.info(f"Стрим {rt.login} завершён (детект).")
+            chan = self._get_send_channel(rt)
+            if chan:
+                try:
+                    await self.send_message(chan, "Стрим закончился, мне больше нечего смотреть...", PRIORITY_ANNOUNCE)
+                except Exception:
+                    pass
 
-        token, expires = await get_app_access_token(self.session)
-        if token:
-            self.app_token = token
-            self.app_token_expire_at = now + max(10, int(expires))
-            return True
-        return False
+        # сохраняем в last_stream_state
+        rt.last_stream_state = bool(live)
+        rt.state.live = bool(live)
+        if not live:
+            rt.state.viewer_count = 0
+        rt.auto_scheduler.set_online(bool(live))
+        if changed:
+            # на старте/конце стрима игра и название обычно меняются
+            self._channel_state_wakeup.set()
+        return changed
+
+    @staticmethod
+    async def _sleep_or_wakeup(event, delay):
+        # спим delay секунд, но просыпаемся раньше, если event выставят
+        event.clear()
+        try:
+            await asyncio.wait_for(event.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
 
     async def _stream_status_loop(self):
+        interval = STREAM_POLL_MIN
         while True:
+            delay = interval
             try:
                 ok = await self._ensure_app_token()
                 if not ok:
-                    await asyncio.sleep(60)
-                    continue
+                    delay = 60
+                else:
+                    # все каналы — запросами по HELIX_BATCH логинов
+                    viewers = {}
+                    live = await helix_streams_live(self.helix, list(self.channels), viewers)
+                    changed = False
+                    for login, is_live in live.items():
+                        rt = self.channels.get(login)
+                        if rt is not None:
+                            rt.state.viewer_count = viewers.get(login, 0)
+                            changed |= await self._set_stream_online(rt, is_live)
+                    if len(live) < len(self.channels):
+                        # ошибка — повторим через короткий промежуток
+                        delay = STREAM_POLL_MIN
+                    else:
+                        interval = STREAM_POLL_MIN if changed else min(STREAM_POLL_MAX, interval * 2)
+                        delay = interval
 
-                live = await helix_is_stream_live(self.session, self.app_token, CHANNEL)
-                if live is None:
-                    # ошибка — освободим токен и повторим через короткий промежуток
-                    self.app_token = None
-                    await asyncio.sleep(15)
-                    continue
+            except Exception as e:
+                logging.exception(f"Ошибка в loop проверки стрима: {e}")
 
-                # смена статуса
-                if live and not self.stream_online:
-                    self.stream_online = True
-                    logging.info("Стрим начался (детект).")
-                    chan = self._get_send_channel()
-                    if chan:
-                        try:
-                            await chan.send("Теперь я тоже смотрю стрим!")
-                        except Exception:
-                            pass
-
-                elif not live and self.stream_online:
-                    self.stream_online = False
-                    logging.info("Стрим завершён (детект).")
-                    chan = self._get_send_channel()
-                    if chan:
-                        try:
-                            await chan.send("Стрим закончился, мне больше нечего смотреть...")
-                        except Exception:
-                            pass
-
-                # сохраняем в last_stream_state
-                self.last_stream_state = bool(live)
+            if self.eventsub is not None and self.eventsub.connected:
+                delay = STREAM_RECONCILE
+            # просыпаемся раньше, если EventSub отвалился
+            await self._sleep_or_wakeup(self._stream_poll_wakeup, delay)
 
+    async def _channel_state_loop(self):
+        while True:
+            try:
+                if await self._ensure_app_token():
+                    await refresh_states(self.helix, [rt.state for rt in self.channels.values()])
             except Exception as e:
-                logging.exception(f"Ошибка в loop проверки стрима: {e}")
+                logging.exception(f"Ошибка обновления состояния канала: {e}")
+
+            delay = CHANNEL_STATE_REFRESH
+            if self.eventsub is not None and self.eventsub.connected:
+                delay = CHANNEL_STATE_RECONCILE
+            await self._sleep_or_wakeup(self._channel_state_wakeup, delay)
 
-            await asyncio.sleep(30)
+    # ---------- EventSub ----------
+    async def _eventsub_loop(self):
+        if not USER_OAUTH or not self.helix.configured:
+            logging.info("EventSub отключён (нет USER_OAUTH/CLIENT_ID) — статус стрима только опросом.")
+            return
+        if self.worker_id is not None:
+            # каналы воркера меняются на ходу, а подписки задаются при подключении
+            logging.info("EventSub отключён в режиме --workers — статус стрима пакетным опросом.")
+            return
+
+        self.eventsub = EventSubClient(
+            self.helix, USER_OAUTH, self._on_eventsub_notification, on_state=self._on_eventsub_state
+        )
+        # channel.follow v2 требует модератора канала — владельца USER_OAUTH
+        moderator = await self.helix.get_token_user(USER_OAUTH)
+        if not moderator:
+            logging.warning("Не удалось узнать владельца USER_OAUTH — новые follow только сверкой и точечными запросами")
+        # канал, чей id не узнать (опечатка, переименование), не держит подписки остальных:
+        # его подписываем позже отдельной задачей, а пока его статус — из опроса
+        unresolved = []
+        for rt in self.channels.values():
+            if await self.broadcaster_id(rt):
+                for sub in self._channel_subscriptions(rt, moderator):
+                    self.eventsub.add_subscription(*sub)
+            else:
+                unresolved.append(rt)
+        if unresolved:
+            logging.warning(f"EventSub: нет id каналов {[rt.login for rt in unresolved]} — повтор через минуту")
+            self._background_tasks.append(asyncio.create_task(self._eventsub_resolve_loop(unresolved, moderator)))
+        await self.eventsub.run()
+
+    @staticmethod
+    def _channel_subscriptions(rt, moderator):
+        """(тип, версия, условие, обязательная) — подписки EventSub одного канала."""
+        condition = {"broadcaster_user_id": rt.state.broadcaster_id}
+        subs = [
+            ("stream.online", "1", condition, True),
+            ("stream.offline", "1", condition, True),
+            ("channel.update", "2", condition, True),
+        ]
+        if moderator:
+            subs.append(("channel.follow", "2", dict(condition, moderator_user_id=moderator["id"]), False))
+        return subs
+
+    async def _eventsub_resolve_loop(self, pending, moderator):
+        """Повторяет поиск id каналов, не найденных при старте EventSub, и подписывает найденные."""
+        while pending:
+            await asyncio.sleep(60)
+            for rt in list(pending):
+                if rt.login not in self.channels:
+                    pending.remove(rt)
+                elif await self.broadcaster_id(rt):
+                    pending.remove(rt)
+                    for sub in self._channel_subscriptions(rt, moderator):
+                        await self.eventsub.subscribe(*sub)
+                    logging.info(f"EventSub: канал {rt.login} подписан")
+
+    def _on_eventsub_state(self, connected):
+        # при потере EventSub сразу возвращаемся к опросу, при подключении — сверяем статус
+        self._stream_poll_wakeup.set()
+        self._channel_state_wakeup.set()
+
+    async def _on_eventsub_notification(self, sub_type, event):
+        rt = self.channels.get((event.get("broadcaster_user_login") or "").lower())
+        if rt is None:
+            return
+        if sub_type == "stream.online":
+            await self._set_stream_online(rt, True)
+        elif sub_type == "stream.offline":
+            await self._set_stream_online(rt, False)
+        elif sub_type == "channel.update":
+            rt.state.update(
+                game_name=event.get("category_name", ""),
+                game_id=event.get("category_id", ""),
+                title=event.get("title", ""),
+            )
+        elif sub_type == "channel.follow":
+            rt.followers.add(event["user_id"], parse_time(event["followed_at"]))
+
+    # ---------- фолловеры ----------
+    async def _followers_loop(self):
+        if not USER_OAUTH or not self.helix.configured:
+            logging.info("Индекс фолловеров отключён (нет USER_OAUTH/CLIENT_ID).")
+            return
+        while True:
+            for rt in list(self.channels.values()):
+                try:
+                    if rt.followers.stale:
+                        broadcaster_id = await self.broadcaster_id(rt)
+                        if broadcaster_id:
+                            await rt.followers.sync(self.helix, broadcaster_id, USER_OAUTH)
+                    elif rt.followers.dirty:
+                        await rt.followers.save()
+                except Exception as e:
+                    logging.exception(f"Ошибка обновления фолловеров {rt.login}: {e}")
+            await asyncio.sleep(FOLLOWERS_POLL)
 
 
 # ========== Запуск ==========
 if __name__ == "__main__":
-    bot = Bot()
-    bot.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Twitch-бот")
+    parser.add_argument("--workers", type=int, default=1, help="раздать каналы CHANNELS по N процессам")
+    args = parser.parse_args()
+
+    init_logging()
+    if args.workers > 1 and WORKER_ID is None:
+        from supervisor import Supervisor
+        Supervisor(CHANNELS, args.workers).run()
+    else:
+        bot = Bot()
+        bot.run()
@@ -0,0 +1,103 @@
+# channel_runtime.py
+import os
+import json
+import logging
+
+from channel_state import ChannelState
+from auto_scheduler import AutoMessageScheduler
+from score_utils import ScoreStore, SCORE_FILE
+from cooldowns import CooldownTable
+from shared_store import SharedScoreStore
+from dispatcher import CommandDispatcher
+from command_registry import command_name
+from presence import PresenceIndex
+from followers import FollowerIndex, FOLLOWERS_FILE
+from analytics import ChatAnalytics
+
+CHANNELS_DIR = "channels"  # channels/<login>/: score.json, состояние авто-сообщений, commands/
+STATE_FILE = "auto_messages_state.json"
+
+
+class ChannelRuntime:
+    """
+    Всё, что у бота своё на каждом канале: live/игра, зрители в чате, фолловеры,
+    расписание авто-сообщений, счёт !цель, cooldowns и свои версии команд (channels/<login>/commands/*.py|.json|.toml
+    перекрывают общие commands/ с тем же именем).
+    Основной канал (первый в CHANNELS) хранит score.json и состояние авто-сообщений
+    в корне, как в одноканальном режиме; остальные — в channels/<login>/.
+    Канал принадлежит одному процессу, поэтому cooldowns и расписание остаются в памяти;
+    при переезде канала на другой воркер cooldowns начинаются заново.
+    """
+
+    def __init__(self, login, primary=False, user_cooldown=0, store=None):
+        self.login = login
+        self.primary = primary
+        self.dir = os.path.join(CHANNELS_DIR, login)
+        data_dir = "." if primary else self.dir
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.channel = None  # twitchio Channel, появляется после JOIN / первого сообщения
+        self.state = ChannelState(login)
+        self.stream_online = False
+        self.last_stream_state = None
+        self.presence = PresenceIndex()  # кто в чате: JOIN/PART и сообщения
+        self.followers = FollowerIndex(os.path.join(data_dir, FOLLOWERS_FILE))
+        self.analytics = ChatAnalytics()  # статистика чата за стрим (!stats, метрики)
+
+        self.auto_messages = []
+        self.auto_scheduler = AutoMessageScheduler()
+        self.state_file = os.path.join(data_dir, STATE_FILE)
+        self.auto_messages_state = {}
+
+        score_file = os.path.join(data_dir, SCORE_FILE)
+        # в режиме --workers счёт живёт в общем хранилище (score.json — начальное значение)
+        self.score_store = SharedScoreStore(store, login, score_file) if store else ScoreStore(score_file)
+        self.cooldowns = CooldownTable(user_cooldown)
+
+        self.commands_dir = os.path.join(self.dir, "commands")
+        self.command_overrides = {}  # имя -> путь в channels/<login>/commands
+        self.command_files = {}  # общие команды + свои
+        self.dispatcher = CommandDispatcher()
+
+    # ---------- команды ----------
+    def scan_overrides(self):
+        overrides = {}
+        if os.path.isdir(self.commands_dir):
+            for fname in sorted(os.listdir(self.commands_dir)):
+                name = command_name(fname)
+                if name is not None:
+                    overrides.setdefault(name, os.path.join(self.commands_dir, fname))
+        if overrides:
+            logging.info(f"Свои команды канала {self.login}: {sorted(overrides)}")
+        self.command_overrides = overrides
+
+    def rebuild_commands(self, shared, aliases=None):
+        files = dict(shared)
+        files.update(self.command_overrides)
+        self.command_files = files
+        self.dispatcher.rebuild(files, aliases)
+
+    # ---------- состояние авто-сообщений ----------
+    def load_auto_messages_state(self):
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    self.auto_messages_state = json.load(f)
+            except Exception:
+                self.auto_messages_state = {}
+        for am in self.auto_messages:
+            st = self.auto_messages_state.get(am["file"])
+            if st:
+                am["last_sent"] = st.get("last_sent", 0)
+                am["counter"] = st.get("counter", 0)
+
+    def save_auto_messages_state(self, am):
+        self.auto_messages_state[am["file"]] = {
+            "last_sent": am["last_sent"],
+            "counter": am["counter"]
+        }
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump(self.auto_messages_state, f)
+        except Exception:
+            logging.exception(f"Не удалось сохранить состояние авто-сообщений {self.login}")
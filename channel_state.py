@@ -0,0 +1,81 @@
+# channel_state.py
+import time
+import logging
+
+
+class ChannelState:
+    """
+    Снимок состояния канала (live, игра, название), который бот держит в памяти.
+    Команды и авто-сообщения читают его синхронно, без запросов к Helix.
+    """
+
+    def __init__(self, login):
+        self.login = login
+        self.broadcaster_id = None
+        self.live = False
+        self.game_name = ""
+        self.game_id = ""
+        self.title = ""
+        self.viewer_count = 0  # из опроса helix/streams (при работающем EventSub — реже)
+        self.updated_at = 0  # epoch последнего успешного обновления
+
+    @property
+    def ready(self):
+        return self.updated_at > 0
+
+    async def refresh(self, helix):
+        """Обновляет игру и название из helix/channels. Возвращает True при успехе."""
+        if not self.broadcaster_id:
+            user = await helix.get_user(self.login)
+            if not user:
+                return False
+            self.broadcaster_id = user["id"]
+
+        # мимо кэша Helix — здесь нужны свежие данные
+        status, js = await helix.request("GET", "channels", params={"broadcaster_id": self.broadcaster_id})
+        data = js.get("data") if status == 200 else None
+        if not data:
+            logging.warning(f"Не удалось обновить состояние канала {self.login}: HTTP {status}")
+            return False
+        self.update(game_name=data[0].get("game_name", ""), game_id=data[0].get("game_id", ""), title=data[0].get("title", ""))
+        return True
+
+    def update(self, game_name=None, game_id=None, title=None):
+        if game_name is not None and game_name != self.game_name and self.ready:
+            logging.info(f"Игра на канале {self.login}: {game_name}")
+        if game_name is not None:
+            self.game_name = game_name
+        if game_id is not None:
+            self.game_id = game_id
+        if title is not None:
+            self.title = title
+        self.updated_at = time.time()
+
+
+async def refresh_states(helix, states, batch=100):
+    """
+    Обновляет игру и название сразу нескольких каналов: helix/channels
+    принимает до batch broadcaster_id за запрос. Возвращает число обновлённых.
+    """
+    for state in states:
+        if not state.broadcaster_id:
+            user = await helix.get_user(state.login)
+            if user:
+                state.broadcaster_id = user["id"]
+    by_id = {state.broadcaster_id: state for state in states if state.broadcaster_id}
+    ids = list(by_id)
+    updated = 0
+    for i in range(0, len(ids), batch):
+        chunk = ids[i:i + batch]
+        # мимо кэша Helix — здесь нужны свежие данные
+        status, js = await helix.request("GET", "channels", params=[("broadcaster_id", b) for b in chunk])
+        data = js.get("data") if status == 200 else None
+        if not data:
+            logging.warning(f"Не удалось обновить состояние каналов: HTTP {status}")
+            continue
+        for item in data:
+            state = by_id.get(item.get("broadcaster_id"))
+            if state:
+                state.update(game_name=item.get("game_name", ""), game_id=item.get("game_id", ""), title=item.get("title", ""))
+                updated += 1
+    return updated
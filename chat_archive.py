@@ -0,0 +1,314 @@
+# chat_archive.py
+import os
+import re
+import gzip
+import mmap
+import time
+import queue
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+
+ARCHIVE_DIR = "archive"
+SEGMENT_BYTES = 32 * 1024 * 1024  # сжатый сегмент больше — начинается следующий
+BATCH_SIZE = 2000  # сообщений за одну запись
+BATCH_SECONDS = 1.0  # но не реже, чем раз в столько секунд
+INDEX_FILE = "lastseen.idx"
+INDEX_CAPACITY = 1 << 12  # начальное число ячеек, растёт вдвое при заполнении на 70%
+
+_SEGMENT_NAME = re.compile(r"chat-(\d{6})\.tsv\.gz$")
+
+# lastseen.idx: заголовок + открытая адресация по 64-битному хэшу "канал\0логин"
+# ячейка: хэш, время последнего сообщения (epoch), число сообщений, первый и последний сегмент
+_HEADER = struct.Struct("<4sIQQ")  # magic, версия, ячеек, занято
+_SLOT = struct.Struct("<QqIHH")
+_MAGIC = b"LSIX"
+_VERSION = 1
+
+
+def user_key(channel, login):
+    digest = hashlib.blake2b(f"{channel.lower()}\0{login.lower()}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # 0 — пустая ячейка
+
+
+def segment_path(directory, number):
+    return os.path.join(directory, f"chat-{number:06d}.tsv.gz")
+
+
+def list_segments(directory):
+    found = []
+    for fname in os.listdir(directory) if os.path.isdir(directory) else []:
+        m = _SEGMENT_NAME.match(fname)
+        if m:
+            found.append(int(m.group(1)))
+    return sorted(found)
+
+
+class LastSeenIndex:
+    """
+    Индекс "зритель -> когда последний раз писал, сколько сообщений, в каких сегментах"
+    в файле через mmap: хэш-таблица с открытой адресацией, поиск — одна-две ячейки,
+    без чтения архива. Пишет только поток архива, читать можно откуда угодно (под lock).
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            self._create(path, INDEX_CAPACITY)
+        self._open()
+
+    def _create(self, path, capacity):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, capacity, 0))
+            f.truncate(_HEADER.size + capacity * _SLOT.size)
+
+    def _open(self):
+        self._file = open(self.path, "rb" if self.readonly else "r+b")
+        access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+        magic, version, self.capacity, self.used = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{self.path}: неизвестный формат индекса")
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                if not self.readonly:
+                    self._mm.flush()
+                self._mm.close()
+                self._file.close()
+                self._mm = None
+
+    def __len__(self):
+        return self.used
+
+    def _find(self, key):
+        """Смещение ячейки ключа или первой пустой на его пути."""
+        mm, mask = self._mm, self.capacity - 1
+        i = key & mask
+        while True:
+            offset = _HEADER.size + i * _SLOT.size
+            slot_key = _SLOT.unpack_from(mm, offset)[0]
+            if slot_key == key or slot_key == 0:
+                return offset, slot_key
+            i = (i + 1) & mask
+
+    def get(self, channel, login):
+        """(last_seen, count, first_segment, last_segment) или None."""
+        key = user_key(channel, login)
+        with self._lock:
+            offset, slot_key = self._find(key)
+            if slot_key == 0:
+                return None
+            return _SLOT.unpack_from(self._mm, offset)[1:]
+
+    def update_many(self, entries, segment):
+        """entries: {key: (last_seen, добавилось сообщений)} одной пачки."""
+        if (self.used + len(entries)) * 10 > self.capacity * 7:
+            self._grow(self.used + len(entries))
+        with self._lock:
+            mm = self._mm
+            for key, (last_seen, count) in entries.items():
+                offset, slot_key = self._find(key)
+                if slot_key == 0:
+                    _SLOT.pack_into(mm, offset, key, int(last_seen), count, segment, segment)
+                    self.used += 1
+                else:
+                    _, prev_seen, prev_count, first, _ = _SLOT.unpack_from(mm, offset)
+                    _SLOT.pack_into(mm, offset, key, max(prev_seen, int(last_seen)), prev_count + count, first, segment)
+            _HEADER.pack_into(mm, 0, _MAGIC, _VERSION, self.capacity, self.used)
+
+    def _grow(self, need):
+        """
+        Новая таблица строится в .tmp без lock (пишет только поток архива, читатели
+        старую таблицу не меняют); под lock — только подмена файла, чтобы get не ждал перехэширования.
+        """
+        capacity = self.capacity
+        while need * 10 > capacity * 7:
+            capacity *= 2
+        old_mm, old_capacity = self._mm, self.capacity
+        tmp = f"{self.path}.tmp"
+        self._create(tmp, capacity)
+        with open(tmp, "r+b") as f:
+            new_mm = mmap.mmap(f.fileno(), 0)
+            mask = capacity - 1
+            for i in range(old_capacity):
+                slot = _SLOT.unpack_from(old_mm, _HEADER.size + i * _SLOT.size)
+                if slot[0] == 0:
+                    continue
+                j = slot[0] & mask
+                while _SLOT.unpack_from(new_mm, _HEADER.size + j * _SLOT.size)[0]:
+                    j = (j + 1) & mask
+                _SLOT.pack_into(new_mm, _HEADER.size + j * _SLOT.size, *slot)
+            _HEADER.pack_into(new_mm, 0, _MAGIC, _VERSION, capacity, self.used)
+            new_mm.flush()
+            new_mm.close()
+        with self._lock:
+            old_mm.close()
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._open()
+        logging.info(f"Индекс {self.path} расширен до {capacity} ячеек")
+
+
+class ChatArchive:
+    """
+    Архив чата: сообщения копятся в очереди, фоновый поток пишет их пачками
+    в сжатые сегменты chat-NNNNNN.tsv.gz (каждая пачка — отдельный gzip-член,
+    поэтому оборванная запись не портит уже записанное) и обновляет LastSeenIndex.
+    Строка сегмента: время, канал, логин, текст — через табуляцию.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.index = LastSeenIndex(os.path.join(directory, INDEX_FILE))
+        segments = list_segments(directory)
+        self.segment = segments[-1] if segments else 1
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="chat-archive", daemon=True)
+        self._thread.start()
+
+    def append(self, channel, login, text, ts=None):
+        """Вызывается из event loop: только кладёт сообщение в очередь."""
+        self._queue.put((time.time() if ts is None else ts, channel, login, text))
+
+    def last_seen(self, channel, login):
+        return self.index.get(channel, login)
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток (блокирует — звать через to_thread)."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.index.close()
+
+    # ---------- фоновый поток ----------
+    def _run(self):
+        q = self._queue
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + BATCH_SECONDS
+            stop = False
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception:
+                self.dropped += len(batch)
+                logging.exception(f"Архив чата: не удалось записать {len(batch)} сообщений")
+            if stop:
+                return
+
+    def _write(self, batch):
+        path = segment_path(self.directory, self.segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            self.segment += 1
+            path = segment_path(self.directory, self.segment)
+            logging.info(f"Архив чата: новый сегмент {path}")
+        lines = []
+        entries = {}
+        for ts, channel, login, text in batch:
+            lines.append(f"{ts:.3f}\t{channel}\t{login}\t{text.replace(chr(9), ' ').replace(chr(10), ' ')}\n")
+            key = user_key(channel, login)
+            prev = entries.get(key)
+            entries[key] = (ts, prev[1] + 1 if prev else 1)
+        with open(path, "ab") as f:
+            # уровень 6 — почти как 9 по размеру, но заметно быстрее
+            f.write(gzip.compress("".join(lines).encode("utf-8"), compresslevel=6))
+        self.index.update_many(entries, self.segment)
+        self.written += len(batch)
+
+
+# ========== поиск без бота ==========
+def iter_messages(directory, segments):
+    for number in segments:
+        path = segment_path(directory, number)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t", 3)
+                if len(parts) == 4:
+                    yield float(parts[0]), parts[1], parts[2], parts[3]
+
+
+def find_archives(root):
+    """Каталоги с архивом: сам root и подкаталоги воркеров."""
+    dirs = [root] if os.path.exists(os.path.join(root, INDEX_FILE)) else []
+    if os.path.isdir(root):
+        for name in sorted(os.listdir(root)):
+            sub = os.path.join(root, name)
+            if os.path.exists(os.path.join(sub, INDEX_FILE)):
+                dirs.append(sub)
+    return dirs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск по архиву чата")
+    parser.add_argument("--dir", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("lastseen", help="когда зритель последний раз писал")
+    p.add_argument("channel")
+    p.add_argument("user")
+    p = sub.add_parser("search", help="сообщения зрителя (читаются только его сегменты)")
+    p.add_argument("channel")
+    p.add_argument("user")
+    p.add_argument("--text", help="подстрока в сообщении")
+    p.add_argument("--limit", type=int, default=50, help="последних сообщений")
+    args = parser.parse_args()
+
+    channel, user = args.channel.lower().lstrip("#"), args.user.lower().lstrip("@")
+    found = False
+    for directory in find_archives(args.dir):
+        index = LastSeenIndex(os.path.join(directory, INDEX_FILE), readonly=True)
+        entry = index.get(channel, user)
+        index.close()
+        if entry is None:
+            continue
+        found = True
+        last_seen, count, first, last = entry
+        if args.cmd == "lastseen":
+            print(f"{directory}: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_seen))}, сообщений: {count}")
+            continue
+        segments = [n for n in list_segments(directory) if first <= n <= last]
+        matches = []
+        for ts, ch, login, text in iter_messages(directory, segments):
+            if ch == channel and login == user and (not args.text or args.text.lower() in text.lower()):
+                matches.append((ts, text))
+                del matches[:-args.limit]
+        for ts, text in matches:
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))} {user}: {text}")
+    if not found:
+        print(f"{user} в архиве {channel} не найден")
+
+
+if __name__ == "__main__":
+    main()
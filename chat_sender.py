@@ -0,0 +1,238 @@
+# chat_sender.py
+import time
+import heapq
+import asyncio
+import logging
+
+from metrics import SEND_WAIT
+
+# приоритеты: меньше — важнее
+PRIORITY_REPLY = 0  # ответы на команды
+PRIORITY_ANNOUNCE = 1  # старт/конец стрима
+PRIORITY_AUTO = 2  # авто-сообщения
+
+# сколько сообщение может ждать в очереди, прежде чем станет неактуальным (секунды)
+DEADLINES = {
+    PRIORITY_REPLY: 15,
+    PRIORITY_ANNOUNCE: 60,
+    PRIORITY_AUTO: 120,
+}
+
+# лимиты Twitch: сообщений за 30 секунд
+RATE_WINDOW = 30
+RATE_LIMIT_USER = 20  # на весь аккаунт, во всех каналах, где бот не модератор
+RATE_LIMIT_MOD = 100  # модератор / владелец канала — свой лимит в каждом таком канале
+BURST_SHARE = 0.25  # какая часть лимита доступна "залпом"
+MAX_MESSAGE_LENGTH = 500  # длиннее Twitch не принимает
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """Режет длинный ответ на сообщения не длиннее limit по пробелам (слово длиннее limit — по символам)."""
+    parts = []
+    current = ""
+    for word in text.split():
+        while len(word) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(word[:limit])
+            word = word[limit:]
+        if current and len(current) + 1 + len(word) > limit:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+class TokenBucket:
+    """
+    Token bucket, подобранный так, чтобы ни в одном окне RATE_WINDOW не уйти за limit:
+    capacity + rate * window == limit.
+    """
+
+    def __init__(self, limit, window=RATE_WINDOW):
+        self.configure(limit, window)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def configure(self, limit, window=RATE_WINDOW):
+        self.capacity = max(1, int(limit * BURST_SHARE))
+        self.rate = (limit - self.capacity) / window
+        if getattr(self, "tokens", None) is not None:
+            self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Сколько секунд ждать до следующего токена (0 — можно отправлять)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class ChatSender:
+    """
+    Очередь исходящих сообщений одного канала с приоритетами и token bucket.
+    Просроченные сообщения выбрасываются, не расходуя лимит.
+    Где бот не модератор, bucket — общий на аккаунт (account, один на всех ChatSender бота):
+    лимит RATE_LIMIT_USER Twitch считает по всем каналам сразу. У модератора — свой на канал.
+    """
+
+    def __init__(self, name, moderator=False, account=None):
+        self.name = name
+        self.moderator = moderator
+        self.account = account if account is not None else TokenBucket(RATE_LIMIT_USER)
+        self._mod_bucket = TokenBucket(RATE_LIMIT_MOD)
+        self.bucket = self._mod_bucket if moderator else self.account
+        self._heap = []  # (priority, seq, deadline, enqueued_at, channel, text, future)
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # статистика
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def depth(self):
+        return len(self._heap)
+
+    def set_moderator(self, moderator):
+        if moderator != self.moderator:
+            self.moderator = moderator
+            self.bucket = self._mod_bucket if moderator else self.account
+            logging.info(f"Лимит сообщений для {self.name}: {'модератор' if moderator else 'обычный'}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def enqueue(self, channel, text, priority=PRIORITY_REPLY):
+        """Ставит сообщение в очередь. Future завершится True (отправлено) или False (выброшено/ошибка)."""
+        fut = asyncio.get_running_loop().create_future()
+        now = time.monotonic()
+        deadline = now + DEADLINES.get(priority, DEADLINES[PRIORITY_AUTO])
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, deadline, now, channel, text, fut))
+        self._wakeup.set()
+        self.start()
+        return fut
+
+    async def send(self, channel, text, priority=PRIORITY_REPLY):
+        return await self.enqueue(channel, text, priority)
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # сначала ждём лимит, потом берём самое важное на этот момент сообщение
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            priority, _seq, deadline, enqueued_at, channel, text, fut = heapq.heappop(self._heap)
+            now = time.monotonic()
+            if now > deadline:
+                self.dropped += 1
+                logging.info(
+                    f"Сообщение в {self.name} устарело и не отправлено: {text[:60]}",
+                    extra={"rate_key": "chat_drop"},
+                )
+                if not fut.done():
+                    fut.set_result(False)
+                continue
+
+            self.bucket.take()
+            waited = now - enqueued_at
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            SEND_WAIT.labels(priority).observe(waited)
+            try:
+                await channel.send(text)
+                self.sent += 1
+                ok = True
+            except Exception as e:
+                self.errors += 1
+                logging.exception(f"Ошибка отправки в {self.name}: {e}")
+                ok = False
+            if not fut.done():
+                fut.set_result(ok)
+
+    def stats(self):
+        handled = self.sent + self.errors
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "wait_avg": self.wait_total / handled if handled else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+class QueuedChannel:
+    """
+    Обёртка над каналом twitchio: send уходит в ChatSender с заданным приоритетом.
+    wait=False — send только ставит сообщение в очередь и возвращает Future доставки
+    (команды: ожидание лимита Twitch не должно съедать их TIMEOUT).
+    """
+
+    def __init__(self, channel, sender, priority, wait=True):
+        self._channel = channel
+        self._sender = sender
+        self._priority = priority
+        self._wait = wait
+
+    def __getattr__(self, item):
+        return getattr(self._channel, item)
+
+    async def send(self, content):
+        if not self._wait:
+            return self._sender.enqueue(self._channel, content, self._priority)
+        return await self._sender.send(self._channel, content, self._priority)
+
+
+class QueuedContext:
+    """
+    Обёртка над Context команды: ctx.send и ctx.channel.send ставят ответ в очередь и не ждут
+    отправки (время в очереди не входит в TIMEOUT команды), слишком длинный ответ уходит
+    несколькими сообщениями. send возвращает Future доставки последней части.
+    ctx.requesters — кому адресован ответ: автор или все, чьи вызовы объединены (COALESCE).
+    """
+
+    def __init__(self, ctx, sender):
+        self._ctx = ctx
+        self._sender = sender
+        self.channel = QueuedChannel(ctx.channel, sender, PRIORITY_REPLY, wait=False)
+        self.requesters = [ctx.author.name]
+
+    def __getattr__(self, item):
+        return getattr(self._ctx, item)
+
+    async def send(self, content):
+        fut = None
+        for part in split_message(content) if len(content) > MAX_MESSAGE_LENGTH else [content]:
+            fut = self._sender.enqueue(self._ctx.channel, part, PRIORITY_REPLY)
+        return fut
@@ -0,0 +1,213 @@
+# command_executor.py
+import os
+import asyncio
+import inspect
+import logging
+import importlib.util
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from metrics import COMMAND_TIMEOUTS, COMMAND_REJECTIONS, COMMAND_COALESCED
+
+# атрибуты модуля команды (рядом с run):
+#   TIMEOUT = 5            — секунд на выполнение, дальше команда отменяется
+#   MAX_CONCURRENCY = 2    — сколько вызовов одновременно; лишние отклоняются сразу
+#   CPU_BOUND = True       — run(request) выполняется в отдельном процессе (см. CommandRequest)
+#   COALESCE = 3           — одинаковые вызовы (команда + аргументы) в канале за столько секунд
+#                            выполняются один раз, ctx.requesters — все, кто вызвал
+DEFAULT_TIMEOUT = 10  # секунд
+THREAD_WORKERS = 8  # синхронные run(ctx)
+PROCESS_WORKERS = int(os.getenv("COMMAND_PROCESSES", "2"))  # 0 — CPU_BOUND выполняются в потоках
+
+
+class CommandRejected(Exception):
+    """Команда уже выполняется MAX_CONCURRENCY раз."""
+
+
+class CommandRequest:
+    """
+    То, что получает CPU_BOUND-команда в отдельном процессе вместо ctx:
+    ctx с каналом и сетью туда не передать. run(request) возвращает текст ответа
+    (или список строк) — бот отправит его сам.
+    """
+
+    __slots__ = ("content", "author", "channel", "requesters")
+
+    def __init__(self, content, author, channel, requesters=None):
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.requesters = requesters or [author]
+
+    @classmethod
+    def from_ctx(cls, ctx):
+        message = getattr(ctx, "message", ctx)
+        author = getattr(ctx.author, "name", "")
+        return cls(
+            message.content or "",
+            author,
+            getattr(ctx.channel, "name", ""),
+            list(getattr(ctx, "requesters", None) or [author]),
+        )
+
+
+class CoalescedCall:
+    """Объединённый вызов: ждёт окно COALESCE, собирая тех, кто вызвал то же самое."""
+
+    def __init__(self, ctx):
+        self.requesters = list(getattr(ctx, "requesters", None) or [ctx.author.name])
+        self._seen = {name.lower() for name in self.requesters}
+
+    def join(self, ctx):
+        name = ctx.author.name
+        if name.lower() not in self._seen:
+            self._seen.add(name.lower())
+            self.requesters.append(name)
+
+
+# ---------- дочерний процесс ----------
+_child_modules = {}  # path -> (mtime_ns, module)
+
+
+def _run_in_child(path, request):
+    st = os.stat(path)
+    cached = _child_modules.get(path)
+    if cached is None or cached[0] != st.st_mtime_ns:
+        spec = importlib.util.spec_from_file_location(f"cpu_command.{os.path.basename(path)[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        cached = _child_modules[path] = (st.st_mtime_ns, module)
+    res = cached[1].run(request)
+    if inspect.iscoroutine(res):
+        res = asyncio.run(res)
+    return res
+
+
+class CommandExecutor:
+    """
+    Выполнение команд с ограничениями: дедлайн с отменой, лимит одновременных вызовов,
+    синхронные run — в пуле потоков, CPU_BOUND — в пуле процессов, чтобы не держать event loop.
+    Поток или процесс, не уложившийся в дедлайн, прервать нельзя — он доработает в фоне,
+    но ответ уже не ждут.
+    """
+
+    def __init__(self, default_timeout=DEFAULT_TIMEOUT, thread_workers=THREAD_WORKERS, process_workers=PROCESS_WORKERS):
+        self.default_timeout = default_timeout
+        self.process_workers = process_workers
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="command")
+        self._processes = None
+        self._running = {}  # имя команды -> сколько выполняется
+        self._coalescing = {}  # (команда, канал, аргументы) -> CoalescedCall в окне ожидания
+        self.timeouts = 0
+        self.rejected = 0
+
+    def limits(self, entry):
+        module = entry.module
+        timeout = getattr(module, "TIMEOUT", None)
+        return (
+            self.default_timeout if timeout is None else timeout,
+            getattr(module, "MAX_CONCURRENCY", None),
+            bool(getattr(module, "CPU_BOUND", False)),
+        )
+
+    @staticmethod
+    def coalesce_key(name, ctx):
+        message = getattr(ctx, "message", ctx)
+        args = " ".join((message.content or "").lower().split()[1:])
+        return name, getattr(ctx.channel, "name", ""), args
+
+    def _process_pool(self):
+        if self._processes is None:
+            # spawn: форк процесса с работающим loop и потоками логов небезопасен
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    async def run(self, name, entry, ctx):
+        """Выполняет entry.func(ctx). CommandRejected — лимит занят, asyncio.TimeoutError — дедлайн."""
+        window = getattr(entry.module, "COALESCE", None)
+        if window and hasattr(ctx, "requesters"):
+            return await self._run_coalesced(name, entry, ctx, window)
+        return await self._run(name, entry, ctx)
+
+    async def _run_coalesced(self, name, entry, ctx, window):
+        """
+        Первый вызов ждёт window секунд и выполняется за всех; остальные в окне только
+        добавляются в ctx.requesters первого и сразу возвращают None.
+        """
+        key = self.coalesce_key(name, ctx)
+        call = self._coalescing.get(key)
+        if call is not None:
+            call.join(ctx)
+            COMMAND_COALESCED.labels(name).inc()
+            return None
+        call = self._coalescing[key] = CoalescedCall(ctx)
+        try:
+            await asyncio.sleep(window)
+        finally:
+            del self._coalescing[key]
+        ctx.requesters = call.requesters
+        return await self._run(name, entry, ctx)
+
+    async def _run(self, name, entry, ctx):
+        timeout, limit, cpu_bound = self.limits(entry)
+        running = self._running.get(name, 0)
+        if limit is not None and running >= limit:
+            self.rejected += 1
+            COMMAND_REJECTIONS.labels(name).inc()
+            raise CommandRejected(name)
+
+        self._running[name] = running + 1
+        try:
+            return await asyncio.wait_for(self._call(entry, ctx, cpu_bound), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            COMMAND_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            left = self._running[name] - 1
+            if left:
+                self._running[name] = left
+            else:
+                del self._running[name]
+
+    async def _call(self, entry, ctx, cpu_bound):
+        loop = asyncio.get_running_loop()
+        func = entry.func
+        if cpu_bound:
+            request = CommandRequest.from_ctx(ctx)
+            if self.process_workers > 0:
+                res = await loop.run_in_executor(self._process_pool(), _run_in_child, entry.path, request)
+            else:
+                res = await loop.run_in_executor(self._threads, func, request)
+                if inspect.isawaitable(res):
+                    res = await res
+            send = ctx.send if hasattr(ctx, "send") else ctx.channel.send
+            for text in ([res] if isinstance(res, str) else res or []):
+                if text:
+                    await send(text)
+            return res
+
+        if inspect.iscoroutinefunction(func):
+            return await func(ctx)
+        # синхронный run — в поток; если он вернул корутину (например, ctx.send(...)), ждём её здесь
+        res = await loop.run_in_executor(self._threads, func, ctx)
+        if inspect.isawaitable(res):
+            res = await res
+        return res
+
+    def stats(self):
+        return {
+            "running": sum(self._running.values()),
+            "coalescing": len(self._coalescing),
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        logging.info("Пулы выполнения команд остановлены")
@@ -0,0 +1,111 @@
+# command_registry.py
+import os
+import hashlib
+import logging
+import importlib.util
+
+from data_commands import DATA_SUFFIXES, compile_data_command
+
+# commands/<имя>.py — модуль с run, commands/<имя>.json|.toml — команда-таблица (data_commands.py)
+COMMAND_SUFFIXES = (".py",) + DATA_SUFFIXES
+
+
+def command_name(fname):
+    """Имя команды по имени файла или None, если файл не команда."""
+    name, ext = os.path.splitext(fname)
+    if ext in COMMAND_SUFFIXES and name and not name.startswith("."):
+        return name
+    return None
+
+
+class LoadedCommand:
+    """Скомпилированный модуль команды (или команда-таблица) и его функция run."""
+
+    __slots__ = ("name", "path", "module", "func", "mtime_ns", "size", "digest")
+
+    def __init__(self, name, path, module, mtime_ns, size, digest):
+        self.name = name
+        self.path = path
+        self.module = module
+        self.func = getattr(module, "run", None)
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+
+
+class CommandRegistry:
+    """
+    Кэш загруженных модулей команд / авто-сообщений.
+    Файл перечитывается только если изменились mtime/размер,
+    а модуль исполняется заново только если изменилось содержимое (хэш).
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._entries = {}  # path -> LoadedCommand
+
+    def get(self, name, path):
+        """
+        Возвращает LoadedCommand для файла path.
+        Если новая версия файла сломана, а старая уже загружена — возвращает старую.
+        FileNotFoundError — если файла нет, остальные исключения — ошибки первой загрузки.
+        """
+        entry = self._entries.get(path)
+        try:
+            return self.load(name, path)
+        except FileNotFoundError:
+            raise
+        except Exception:
+            if entry is None:
+                raise
+            return entry
+
+    def load(self, name, path):
+        """
+        Загружает (или берёт из кэша) модуль и проверяет, что в нём есть callable run.
+        При ошибке предыдущая версия остаётся в кэше, а исключение пробрасывается.
+        """
+        st = os.stat(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            return entry
+
+        with open(path, "rb") as f:
+            source = f.read()
+        digest = hashlib.blake2b(source, digest_size=16).digest()
+
+        # файл "тронули", но содержимое то же — модуль не пересобираем
+        if entry is not None and entry.digest == digest:
+            entry.mtime_ns = st.st_mtime_ns
+            entry.size = st.st_size
+            return entry
+
+        try:
+            module = self._exec_module(name, path, source)
+            if not callable(getattr(module, "run", None)):
+                raise ValueError(f"в модуле {self.prefix}.{name} нет функции run")
+        except Exception as e:
+            if entry is not None:
+                # правка отклонена: оставляем старую версию и не пытаемся
+                # загрузить этот же файл повторно, пока его снова не изменят
+                entry.mtime_ns = st.st_mtime_ns
+                entry.size = st.st_size
+                logging.error(f"Новая версия {path} отклонена, работает предыдущая: {e}")
+            raise
+
+        entry = LoadedCommand(name, path, module, st.st_mtime_ns, st.st_size, digest)
+        self._entries[path] = entry
+        logging.info(f"Загружен модуль {self.prefix}.{name}")
+        return entry
+
+    def forget(self, path):
+        self._entries.pop(path, None)
+
+    def _exec_module(self, name, path, source):
+        if path.endswith(DATA_SUFFIXES):
+            return compile_data_command(name, path, source)
+        spec = importlib.util.spec_from_file_location(f"{self.prefix}.{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        code = compile(source, path, "exec")
+        exec(code, module.__dict__)
+        return module
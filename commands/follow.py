@@ -1,105 +1,77 @@
-import aiohttp
+import time
 import datetime
 import os
-import logging
 
-CHANNEL = os.getenv("CHANNEL")
-CLIENT_ID = os.getenv("CLIENT_ID")
+from followers import parse_time
+
 USER_OAUTH = os.getenv("USER_OAUTH")  # токен со scope moderator:read:followers
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 
-async def run(ctx):
-    bot = ctx.bot
-    session = bot.session
 
-    if not USER_OAUTH:
-        await ctx.send("Нет токена USER_OAUTH в .env (нужен scope moderator:read:followers).")
-        return
+def _format_since(followed_at):
+    delta = datetime.timedelta(seconds=max(0, time.time() - followed_at))
 
-    headers = {
-        "Client-ID": CLIENT_ID,
-        "Authorization": f"Bearer {USER_OAUTH}"
-    }
+    days = delta.days
+    months, days = divmod(days, 30)
+    hours, rem = divmod(delta.seconds, 3600)
+    minutes, _ = divmod(rem, 60)
 
-    user = ctx.author.name
+    msg_parts = []
+    if months > 0:
+        msg_parts.append(f"{months} мес.")
+    if days > 0:
+        msg_parts.append(f"{days} дн.")
+    if hours > 0:
+        msg_parts.append(f"{hours} ч.")
+    if minutes > 0:
+        msg_parts.append(f"{minutes} мин.")
+    return " ".join(msg_parts) or "меньше минуты"
 
-    async def get_app_access_token(session):
-        url = "https://id.twitch.tv/oauth2/token"
-        data = {
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET,
-            "grant_type": "client_credentials",
-        }
-        try:
-            async with session.post(url, data=data) as resp:
-                text = await resp.text()
-                if resp.status != 200:
-                    logging.error(f"Ошибка получения App Token: HTTP {resp.status} — {text}")
-                    return None, 0
-                js = await resp.json()
-                token = js.get("access_token")
-                expires = int(js.get("expires_in", 0))
-                logging.info("Получен App Access Token")
-                return token, expires
-        except Exception as e:
-            logging.exception(f"Исключение при запросе App Token: {e}")
-            return None, 0
 
-    # --- получаем user_id зрителя ---
-    url_users = "https://api.twitch.tv/helix/users"
-    async with session.get(url_users, headers=headers, params={"login": user}) as resp:
-        js = await resp.json()
-        if resp.status != 200:
-            await ctx.send(f"Ошибка при получении данных пользователя: {js}")
-            return
-        if not js.get("data"):
-            await ctx.send("Не нашёл пользователя.")
-            return
-        user_id = js["data"][0]["id"]
+async def run(ctx):
+    bot = ctx.bot
+    rt = bot.runtime_for(ctx.channel)
+    user = ctx.author.name
+    user_id = getattr(ctx.author, "id", None)
+
+    # --- сначала локальный индекс фолловеров (сверка + channel.follow из EventSub) ---
+    followed_at = rt.followers.lookup(user_id) if user_id else None
 
-    # --- получаем broadcaster_id канала ---
-    async with session.get(url_users, headers=headers, params={"login": CHANNEL}) as resp:
-        js = await resp.json()
-        if resp.status != 200:
-            await ctx.send(f"Ошибка при получении данных канала: {js}")
+    if followed_at is None:
+        # промах: возможно, follow совсем свежий
+        if not USER_OAUTH:
+            await ctx.send("Нет токена USER_OAUTH в .env (нужен scope moderator:read:followers).")
             return
-        if not js.get("data"):
-            await ctx.send("Не нашёл канал.")
+        channel_id = await bot.broadcaster_id(rt)
+        if not user_id or not channel_id:
+            await ctx.send("Не удалось получить данные пользователя или канала.")
             return
-        channel_id = js["data"][0]["id"]
-
-    # --- проверяем фолловера ---
-    url_follows = "https://api.twitch.tv/helix/channels/followers"
-    params = {"broadcaster_id": channel_id, "user_id": user_id}
-
-    async with session.get(url_follows, headers=headers, params=params) as resp:
-        js = await resp.json()
-        if resp.status != 200:
+        # страница самых новых фолловеров — общая (кэш Helix) для всех, кто спросил в эти секунды
+        params = {"broadcaster_id": channel_id, "first": 100}
+        status, js = await bot.helix.get("channels/followers", params, token=USER_OAUTH)
+        if status != 200:
             await ctx.send(f"Ошибка при проверке фолловеров: {js}")
             return
+        for f in js.get("data", []):
+            if rt.followers.lookup(f["user_id"]) is None:
+                rt.followers.add(f["user_id"], parse_time(f["followed_at"]))
+        followed_at = rt.followers.lookup(user_id)
 
-        data = js.get("data", [])
-        if not data:
+        if followed_at is None:
+            # индексу на "нет" верить нельзя (channel.follow мог не подписаться, в --workers
+            # EventSub нет, новых follow могло быть больше страницы) — спрашиваем точечно;
+            # ответ по зрителю тоже кэшируется (CACHE_TTLS), повторные !follow его не дёргают
+            params = {"broadcaster_id": channel_id, "user_id": user_id}
+            status, js = await bot.helix.get("channels/followers", params, token=USER_OAUTH)
+            if status != 200:
+                await ctx.send(f"Ошибка при проверке фолловеров: {js}")
+                return
+            data = js.get("data", [])
+            if data:
+                followed_at = parse_time(data[0]["followed_at"])
+                rt.followers.add(user_id, followed_at)
+
+        if followed_at is None:
             await ctx.send(f"@{user}, похоже ты ещё не зафолловлен! Поддержи стримера ❤️")
             return
 
-        followed_at = data[0]["followed_at"]
-        dt_follow = datetime.datetime.fromisoformat(followed_at.replace("Z", "+00:00"))
-        delta = datetime.datetime.now(datetime.timezone.utc) - dt_follow
-
-        days = delta.days
-        months, days = divmod(days, 30)
-        hours, rem = divmod(delta.seconds, 3600)
-        minutes, _ = divmod(rem, 60)
-
-        msg_parts = []
-        if months > 0:
-            msg_parts.append(f"{months} мес.")
-        if days > 0:
-            msg_parts.append(f"{days} дн.")
-        if hours > 0:
-            msg_parts.append(f"{hours} ч.")
-        if minutes > 0:
-            msg_parts.append(f"{minutes} мин.")
-
-        await ctx.send(f"@{user}, ты фолловишь канал уже {' '.join(msg_parts)}!")
\ No newline at end of file
+    await ctx.send(f"@{user}, ты фолловишь канал уже {_format_since(followed_at)}!")
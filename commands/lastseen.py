@@ -0,0 +1,38 @@
+import time
+import datetime
+
+
+def _format_ago(ts):
+    delta = datetime.timedelta(seconds=max(0, time.time() - ts))
+    hours, rem = divmod(delta.seconds, 3600)
+    minutes, _ = divmod(rem, 60)
+
+    msg_parts = []
+    if delta.days > 0:
+        msg_parts.append(f"{delta.days} дн.")
+    if hours > 0:
+        msg_parts.append(f"{hours} ч.")
+    if minutes > 0:
+        msg_parts.append(f"{minutes} мин.")
+    return " ".join(msg_parts) + " назад" if msg_parts else "только что"
+
+
+async def run(ctx):
+    archive = ctx.bot.archive
+    if archive is None:
+        await ctx.send("Архив чата выключен (CHAT_ARCHIVE=0).")
+        return
+
+    parts = (ctx.message.content or "").split()
+    if len(parts) < 2:
+        await ctx.send(f"@{ctx.author.name}, использование: !lastseen <ник>")
+        return
+    target = parts[1].lstrip("@").strip().lower()
+
+    # индекс обновляется пачками — сообщения последней секунды могут быть ещё не в нём
+    entry = archive.last_seen(ctx.bot.runtime_for(ctx.channel).login, target)
+    if entry is None:
+        await ctx.send(f"@{ctx.author.name}, {target} в этом чате ещё не писал.")
+        return
+    last_seen, count, _, _ = entry
+    await ctx.send(f"@{ctx.author.name}, {target} последний раз писал {_format_ago(last_seen)} (всего сообщений: {count}).")
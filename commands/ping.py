@@ -1,2 +0,0 @@
-async def run(ctx):
-    await ctx.send(f"Понг блять!")
\ No newline at end of file
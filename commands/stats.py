@@ -0,0 +1,12 @@
+def _top(items, prefix=""):
+    return ", ".join(f"{prefix}{name} ({count})" for name, count in items) or "—"
+
+
+async def run(ctx):
+    stats = ctx.bot.runtime_for(ctx.channel).analytics.snapshot(top=3)
+    await ctx.send(
+        f"За стрим: {stats['messages']} сообщений от ~{stats['unique_chatters']} зрителей, "
+        f"сейчас {stats['per_minute']} в минуту (пик {stats['peak_per_minute']}). "
+        f"Больше всех пишут: {_top(stats['top_chatters'])}. "
+        f"Частые команды: {_top(stats['top_commands'], '!')}"
+    )
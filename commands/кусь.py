@@ -18,22 +18,6 @@ BITE_MESSAGES = [
     "{user} сделал большой кусь {target} — ого!"
 ]
 
-def _get_name_from_chatter(ch):
-    if ch is None:
-        return None
-    if isinstance(ch, str):
-        return ch
-    
-    for attr in ("name", "display_name", "login", "user", "nick"):
-        v = getattr(ch, attr, None)
-        if isinstance(v, str) and v:
-            return v
-    # fallback
-    try:
-        return str(ch)
-    except Exception:
-        return None
-
 async def run(ctx):
     author = ctx.author.name
     author_lc = author.lower()
@@ -44,38 +28,14 @@ async def run(ctx):
     if len(parts) > 1:
         target = parts[1].lstrip("@").strip()
     else:
-        # Попытка собрать список зрителей из разных мест
-        candidates = []
-
-        try:
-            chatters = getattr(ctx.channel, "chatters", None)
-            if chatters:
-                candidates = [_get_name_from_chatter(c) for c in chatters]
-        except Exception:
-            candidates = []
-
-        if not candidates:
-            try:
-                chs = getattr(ctx.bot, "connected_channels", None)
-                if chs:
-                    ch0 = chs[0]
-                    chatters = getattr(ch0, "chatters", None)
-                    if chatters:
-                        candidates = [_get_name_from_chatter(c) for c in chatters]
-            except Exception:
-                pass
+        # случайный зритель из тех, кто сейчас в чате; чаще — кто активно пишет
+        presence = ctx.bot.presence(ctx.channel)
+        target = presence.sample(exclude=BLOCKED_USERS | {author_lc}, weighted=True)
 
-        # очищаем кандидатов и убираем None, пустые и автора
-        candidates = [c for c in (candidates or []) if c and c.strip()]
-        candidates = [c for c in candidates if c.lower() != author_lc]
-
-        if not candidates:
+        if not target:
             await ctx.send(f"@{author}, сейчас некому делать кусь — никого в чате не нашёл.")
             return
 
-        # выбираем случайного
-        target = random.choice(candidates)
-
     if not target:
         await ctx.send(f"@{author}, не получилось определить цель для кусь.")
         return
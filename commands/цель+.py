@@ -1,10 +1,6 @@
-from score_utils import load_score, save_score
-import os
-
-CHANNEL = os.getenv("CHANNEL")
-
 async def run(ctx):
-    if ctx.author.name.lower() != CHANNEL.lower():
+    # менять счёт может только стример этого канала
+    if ctx.author.name.lower() != ctx.channel.name.lower():
         return
 
     parts = ctx.message.content.split()
@@ -13,12 +9,7 @@ async def run(ctx):
         return
 
     value = int(parts[1])
-    data = load_score()
-    current = data["score"]
-    goal = data["goal"]
-
-    new_value = min(current + value, goal)  # ограничиваем максимумом
-    data["current"] = new_value
-    save_score(data)
+    # счёт хранится в памяти бота и ограничивается диапазоном [0, goal]
+    data = await ctx.bot.runtime_for(ctx.channel).score_store.add(value)
 
-    await ctx.send(f"Счёт обновлён: {data['current']}/{goal}")
\ No newline at end of file
+    await ctx.send(f"Счёт обновлён: {data['current']}/{data['goal']}")
\ No newline at end of file
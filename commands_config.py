@@ -0,0 +1,34 @@
+# Настройки команд
+# COMMAND_ALIASES: дополнительные имена команд (алиас -> имя файла в commands без расширения)
+# Регистр, ё/е и похожие латинские/кириллические буквы учитываются автоматически.
+
+COMMAND_ALIASES = {
+    'nick': 'ник',
+    'goal': 'цель',
+    'goal+': 'цель+',
+    'goal-': 'цель-',
+    'bite': 'кусь',
+    'статистика': 'stats',
+    'seen': 'lastseen',
+}
+
+# COMMAND_COOLDOWNS: cooldown отдельных команд в секундах (общий на зрителя — COMMAND_COOLDOWN в bot.py)
+#   user: сколько один зритель ждёт между вызовами этой команды
+#   global: сколько весь канал ждёт между вызовами этой команды
+# Модераторы и стример cooldown не ждут.
+# Пример: 'drops': {'global': 30}, 'кусь': {'user': 15}
+
+COMMAND_COOLDOWNS = {
+}
+
+# Ограничения выполнения задаются в самом файле команды, рядом с run:
+#   TIMEOUT = 5          — секунд на выполнение (по умолчанию 10), дальше команда отменяется
+#   MAX_CONCURRENCY = 2  — сколько вызовов одновременно; лишние отклоняются
+#   CPU_BOUND = True     — тяжёлые вычисления: run(request) идёт в отдельном процессе,
+#                          получает request.content/author/channel и возвращает текст ответа
+#   COALESCE = 3         — одинаковые вызовы за 3 секунды выполняются один раз за всех:
+#                          ctx.requesters — все вызвавшие, длинный ответ режется на несколько сообщений
+# Синхронный def run(ctx) сам уходит в пул потоков и не держит чат.
+
+# Простые команды "выбрать шаблон и подставить {user}/{target}" можно описать файлом
+# commands/<имя>.json или .toml вместо .py — формат в data_commands.py.
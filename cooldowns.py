@@ -0,0 +1,106 @@
+# cooldowns.py
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 50_000  # записей на одну область; старые вытесняются
+
+
+class CooldownScope:
+    """
+    Область cooldown с одинаковым сроком для всех ключей.
+    Раз срок общий, порядок вставки в OrderedDict совпадает с порядком истечения:
+    просроченные записи всегда в начале и снимаются за O(1) на каждую.
+    """
+
+    __slots__ = ("ttl", "maxsize", "_items")
+
+    def __init__(self, ttl, maxsize=DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # key -> expire_at (monotonic)
+
+    def __len__(self):
+        return len(self._items)
+
+    def remaining(self, key, now):
+        expire_at = self._items.get(key)
+        if expire_at is None or expire_at <= now:
+            return 0.0
+        return expire_at - now
+
+    def hit(self, key, now):
+        self._items.pop(key, None)
+        self._items[key] = now + self.ttl
+        self._evict(now)
+
+    def _evict(self, now):
+        items = self._items
+        while items:
+            key, expire_at = next(iter(items.items()))
+            if expire_at <= now or len(items) > self.maxsize:
+                items.popitem(last=False)
+            else:
+                break
+
+
+class CooldownTable:
+    """
+    Cooldown'ы команд:
+      - общий на зрителя (любая команда) — user_cooldown;
+      - на зрителя для конкретной команды — command_cooldowns[cmd]["user"];
+      - на команду для всего канала — command_cooldowns[cmd]["global"].
+    Память ограничена: записи истекают сами и вытесняются при переполнении.
+    """
+
+    def __init__(self, user_cooldown, command_cooldowns=None, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.user = CooldownScope(user_cooldown, maxsize)
+        self.per_user = {}  # cmd -> CooldownScope(зрители)
+        self.per_command = {}  # cmd -> CooldownScope(один ключ)
+        self.rejected = 0
+        self.configure(command_cooldowns or {})
+
+    def configure(self, command_cooldowns):
+        self.per_user = {
+            cmd: CooldownScope(cfg["user"], self.maxsize)
+            for cmd, cfg in command_cooldowns.items() if cfg.get("user")
+        }
+        self.per_command = {
+            cmd: CooldownScope(cfg["global"], 1)
+            for cmd, cfg in command_cooldowns.items() if cfg.get("global")
+        }
+
+    def check(self, user, command, bypass=False, now=None):
+        """
+        0 — можно выполнять (вызов засчитан), иначе — сколько секунд осталось ждать.
+        bypass (модератор/стример) пропускает без cooldown и ничего не записывает.
+        """
+        if bypass:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+
+        per_user = self.per_user.get(command)
+        per_command = self.per_command.get(command)
+        wait = self.user.remaining(user, now)
+        if per_user is not None:
+            wait = max(wait, per_user.remaining(user, now))
+        if per_command is not None:
+            wait = max(wait, per_command.remaining(command, now))
+        if wait > 0:
+            self.rejected += 1
+            return wait
+
+        self.user.hit(user, now)
+        if per_user is not None:
+            per_user.hit(user, now)
+        if per_command is not None:
+            per_command.hit(command, now)
+        return 0.0
+
+    def stats(self):
+        return {
+            "users": len(self.user),
+            "per_command_users": sum(len(s) for s in self.per_user.values()),
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,173 @@
+# data_commands.py
+import json
+import random
+import string
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+# Команды-таблицы: вместо commands/<имя>.py — commands/<имя>.json (или .toml).
+# Файл компилируется при загрузке в обработчик в памяти; на вызове нет ни импорта, ни разбора.
+#
+# Типы ("type"):
+#   text     — {"text": "Понг!"}
+#   weighted — {"choices": [{"text": "...", "weight": 38}, ...]}  (weight по умолчанию 1;
+#              можно просто список строк — тогда все равновероятны)
+#   range    — {"min": -20, "max": 100, "default": "... {value} ...",
+#               "buckets": [{"from": 80, "text": "..."}, {"to": 0, "text": "..."}]}
+#              случайное целое из [min, max]; первая подходящая корзина, иначе default
+#   by_game  — {"games": {"League of Legends": "..."}, "default": "...", "error": "..."}
+#              ответ по текущей игре канала (ChannelState)
+#
+# Подстановки в шаблонах: {user} — автор, {target} — текст после команды или автор,
+# {value} — число (range), {game} — текущая игра (by_game).
+DATA_SUFFIXES = (".json", ".toml")
+FIELDS = {"user", "target", "value", "game"}
+MAX_RANGE = 100000  # range раскладывается в таблицу value -> шаблон
+
+
+class AliasSampler:
+    """Выбор индекса с заданными весами за O(1) (alias method Уолкера/Воуза)."""
+
+    __slots__ = ("_prob", "_alias", "_n")
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0 or any(w < 0 for w in weights):
+            raise ValueError("веса должны быть неотрицательными, хотя бы один — больше нуля")
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # остатки — 1.0 с точностью до округления
+        self._prob = prob
+        self._alias = alias
+        self._n = n
+
+    def sample(self, rnd=random.random):
+        i = int(rnd() * self._n)
+        return i if rnd() < self._prob[i] else self._alias[i]
+
+
+def _template(text, where):
+    if not isinstance(text, str):
+        raise ValueError(f"{where}: ожидается строка")
+    for _, field, _, _ in string.Formatter().parse(text):
+        if field is not None and field not in FIELDS:
+            raise ValueError(f"{where}: неизвестная подстановка {{{field}}}, доступны {sorted(FIELDS)}")
+    return text
+
+
+def _target(ctx):
+    parts = (ctx.message.content or "").split(maxsplit=1)
+    return parts[1] if len(parts) > 1 else ctx.author.name
+
+
+class DataCommand:
+    """Скомпилированная команда-таблица; run(ctx) — как у модуля команды."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        kind = spec.get("type", "text")
+        builder = getattr(self, f"_build_{kind}", None)
+        if builder is None:
+            raise ValueError(f"неизвестный type {kind!r}")
+        self.kind = kind
+        builder(spec)
+
+    # ---------- компиляция ----------
+    def _build_text(self, spec):
+        self.text = _template(spec.get("text"), "text")
+        self._respond = self._respond_text
+
+    def _build_weighted(self, spec):
+        choices = spec.get("choices")
+        if not isinstance(choices, list) or not choices:
+            raise ValueError("weighted: нужен непустой список choices")
+        texts, weights = [], []
+        for i, c in enumerate(choices):
+            if isinstance(c, str):
+                c = {"text": c}
+            texts.append(_template(c.get("text"), f"choices[{i}]"))
+            weights.append(float(c.get("weight", 1)))
+        self.texts = texts
+        self.sampler = AliasSampler(weights)
+        self._respond = self._respond_weighted
+
+    def _build_range(self, spec):
+        lo, hi = int(spec["min"]), int(spec["max"])
+        if hi < lo or hi - lo >= MAX_RANGE:
+            raise ValueError(f"range: нужно min <= max и не больше {MAX_RANGE} значений")
+        default = _template(spec.get("default"), "default")
+        table = [None] * (hi - lo + 1)
+        for i, b in enumerate(spec.get("buckets", [])):
+            text = _template(b.get("text"), f"buckets[{i}]")
+            start = max(lo, int(b.get("from", lo)))
+            end = min(hi, int(b.get("to", hi)))
+            for v in range(start, end + 1):
+                if table[v - lo] is None:  # первая подходящая корзина
+                    table[v - lo] = text
+        self.lo, self.hi = lo, hi
+        self.table = [t if t is not None else default for t in table]
+        self._respond = self._respond_range
+
+    def _build_by_game(self, spec):
+        games = spec.get("games")
+        if not isinstance(games, dict):
+            raise ValueError("by_game: нужен словарь games")
+        self.games = {g: _template(t, f"games[{g}]") for g, t in games.items()}
+        self.default = _template(spec.get("default", "Подходящего ответа для этой игры нет"), "default")
+        self.error = _template(spec.get("error", "Ошибка: не удалось получить данные о канале."), "error")
+        self._respond = self._respond_by_game
+
+    # ---------- вызов ----------
+    async def _respond_text(self, ctx, fields):
+        return self.text
+
+    async def _respond_weighted(self, ctx, fields):
+        return self.texts[self.sampler.sample()]
+
+    async def _respond_range(self, ctx, fields):
+        value = random.randint(self.lo, self.hi)
+        fields["value"] = value
+        return self.table[value - self.lo]
+
+    async def _respond_by_game(self, ctx, fields):
+        state = ctx.bot.runtime_for(ctx.channel).state
+        # состояние канала обновляет бот; сеть трогаем только если снимка ещё нет
+        if not state.ready and not await state.refresh(ctx.bot.helix):
+            return self.error
+        fields["game"] = state.game_name or ""
+        return self.games.get(state.game_name, self.default)
+
+    async def run(self, ctx):
+        fields = {"user": ctx.author.name, "target": _target(ctx), "value": "", "game": ""}
+        template = await self._respond(ctx, fields)
+        await ctx.send(template.format_map(fields))
+
+
+def compile_data_command(name, path, source):
+    """Разбирает JSON/TOML и возвращает DataCommand; ошибки формата — ValueError."""
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML-команды требуют Python 3.11+ (tomllib)")
+        spec = tomllib.loads(source.decode("utf-8"))
+    else:
+        spec = json.loads(source.decode("utf-8"))
+    if not isinstance(spec, dict):
+        raise ValueError("ожидается объект с полем type")
+    try:
+        return DataCommand(name, spec)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"{path}: неполное описание ({e})") from e
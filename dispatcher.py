@@ -0,0 +1,50 @@
+# dispatcher.py
+import re
+
+# нормализация имени команды: регистр, ё/е и похожие латинские/кириллические буквы
+# сводятся к одной форме, чтобы "!Кусь", "!kусь" (латинская k) и "!цeль" (латинская e) находили команду
+_LOOKALIKES = {
+    "ё": "e",
+    "е": "e",
+    "а": "a",
+    "о": "o",
+    "р": "p",
+    "с": "c",
+    "у": "y",
+    "х": "x",
+    "к": "k",
+    "і": "i",
+}
+NORMALIZE_TABLE = str.maketrans(_LOOKALIKES)
+
+# имя команды — всё от "!" до первого пробела; остальное сообщение не трогаем
+_COMMAND_TOKEN = re.compile(r"!(\S+)")
+
+
+def normalize(name):
+    return name.lower().translate(NORMALIZE_TABLE)
+
+
+class CommandDispatcher:
+    """Таблица "нормализованное имя/алиас -> имя команды", пересобирается при изменении команд."""
+
+    def __init__(self):
+        self._table = {}
+
+    def rebuild(self, command_names, aliases=None):
+        table = {normalize(name): name for name in command_names}
+        for alias, target in (aliases or {}).items():
+            if target in command_names:
+                table.setdefault(normalize(alias), target)
+        self._table = table
+
+    def token(self, content):
+        """Первое слово после "!" или None."""
+        m = _COMMAND_TOKEN.match(content)
+        return m.group(1) if m else None
+
+    def resolve(self, token):
+        """Имя команды по токену (с учётом алиасов и нормализации) или None."""
+        if token is None:
+            return None
+        return self._table.get(normalize(token))
@@ -0,0 +1,184 @@
+# eventsub.py
+import os
+import json
+import asyncio
+import logging
+
+import aiohttp
+
+# адреса можно переопределить, например на локальный `twitch event websocket start-server`
+EVENTSUB_WS_URL = os.getenv("EVENTSUB_WS_URL", "wss://eventsub.wss.twitch.tv/ws")
+EVENTSUB_SUBSCRIBE_URL = os.getenv("EVENTSUB_SUBSCRIBE_URL", "eventsub/subscriptions")
+
+RECONNECT_MIN = 1  # секунд, удваивается до RECONNECT_MAX
+RECONNECT_MAX = 60
+
+
+class EventSubClient:
+    """
+    EventSub через WebSocket: держит соединение, после каждого нового session_welcome
+    заново создаёт подписки, на session_reconnect переходит на новый адрес,
+    при обрыве переподключается с экспоненциальной задержкой.
+    on_notification(sub_type, event) вызывается на каждое уведомление,
+    on_state(connected) — когда соединение с активными подписками появляется/пропадает.
+    Для WebSocket-транспорта Twitch требует пользовательский токен (token).
+    """
+
+    def __init__(self, helix, token, on_notification, on_state=None, url=EVENTSUB_WS_URL):
+        self.helix = helix
+        self.token = token
+        self.on_notification = on_notification
+        self.on_state = on_state
+        self.url = url
+        self.subscriptions = []  # (type, version, condition, required)
+        self._required = set()  # без этих подписок EventSub не считается рабочим
+        self.session_id = None
+        self._connected = False
+        self._active = set()  # (тип, условие) подписок, подтверждённых Twitch
+        self._seen_ids = []  # message_id последних сообщений (Twitch может прислать дубль)
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def add_subscription(self, sub_type, version, condition, required=True):
+        """required=False — подписка-дополнение: её отказ не переводит бота на опрос."""
+        self.subscriptions.append((sub_type, version, condition, required))
+        if required:
+            self._required.add(self._key(sub_type, condition))
+
+    @staticmethod
+    def _key(sub_type, condition):
+        # одинаковые типы подписок бывают на разных каналах — различаем по условию
+        return sub_type, tuple(sorted((condition or {}).items()))
+
+    def _set_connected(self, value):
+        if value != self._connected:
+            self._connected = value
+            logging.info(f"EventSub {'подключён' if value else 'недоступен'}")
+            if self.on_state:
+                try:
+                    self.on_state(value)
+                except Exception as e:
+                    logging.exception(f"Ошибка в обработчике состояния EventSub: {e}")
+
+    # ---------- основной цикл ----------
+    async def run(self):
+        delay = RECONNECT_MIN
+        url = self.url
+        resubscribe = True
+        while True:
+            next_url = None
+            try:
+                next_url = await self._session(url, resubscribe)
+                delay = RECONNECT_MIN
+            except asyncio.CancelledError:
+                self._set_connected(False)
+                raise
+            except Exception as e:
+                logging.warning(f"EventSub соединение потеряно: {e!r}")
+            self._set_connected(False)
+
+            if next_url:
+                # session_reconnect: подписки переезжают вместе с сессией
+                url, resubscribe = next_url, False
+                continue
+            url, resubscribe = self.url, True
+            await asyncio.sleep(delay)
+            delay = min(RECONNECT_MAX, delay * 2)
+
+    async def _session(self, url, resubscribe):
+        """Одна WebSocket-сессия. Возвращает reconnect_url или None, если соединение закрылось."""
+        session = self.helix.get_session()
+        async with session.ws_connect(url, heartbeat=None) as ws:
+            keepalive = 10
+            while True:
+                msg = await ws.receive(timeout=keepalive + 5)
+                if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING):
+                    logging.warning(f"EventSub закрыл соединение: {ws.close_code}")
+                    return None
+                if msg.type == aiohttp.WSMsgType.ERROR:
+                    raise ws.exception() or ConnectionError("ошибка WebSocket")
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+
+                data = json.loads(msg.data)
+                metadata = data.get("metadata", {})
+                payload = data.get("payload", {})
+                msg_type = metadata.get("message_type")
+
+                msg_id = metadata.get("message_id")
+                if msg_id:
+                    if msg_id in self._seen_ids:
+                        continue
+                    self._seen_ids.append(msg_id)
+                    del self._seen_ids[:-50]
+
+                if msg_type == "session_welcome":
+                    sess = payload.get("session", {})
+                    self.session_id = sess.get("id")
+                    keepalive = sess.get("keepalive_timeout_seconds") or keepalive
+                    if resubscribe:
+                        await self._subscribe_all()
+                        if not self._active:
+                            raise ConnectionError("подписки EventSub не созданы")
+                    self._set_connected(True)
+                elif msg_type == "session_keepalive":
+                    pass
+                elif msg_type == "notification":
+                    sub_type = metadata.get("subscription_type")
+                    try:
+                        res = self.on_notification(sub_type, payload.get("event", {}))
+                        if asyncio.iscoroutine(res):
+                            await res
+                    except Exception as e:
+                        logging.exception(f"Ошибка обработки EventSub {sub_type}: {e}")
+                elif msg_type == "session_reconnect":
+                    reconnect_url = payload.get("session", {}).get("reconnect_url")
+                    logging.info("EventSub просит переподключиться")
+                    return reconnect_url
+                elif msg_type == "revocation":
+                    sub = payload.get("subscription", {})
+                    sub_type = sub.get("type")
+                    logging.warning(f"EventSub подписка {sub_type} отозвана: {sub.get('status')}")
+                    key = self._key(sub_type, sub.get("condition"))
+                    self._active.discard(key)
+                    if key in self._required:
+                        self._set_connected(False)
+
+    async def subscribe(self, sub_type, version, condition, required=True):
+        """
+        Подписка, добавленная после запуска run (например, канал, чей id узнали позже):
+        запоминается для переподключений и, если сессия уже есть, создаётся сразу.
+        """
+        self.add_subscription(sub_type, version, condition, required)
+        if not self.connected:
+            return
+        await self._subscribe_one(sub_type, version, condition, required)
+        if required and self._key(sub_type, condition) not in self._active:
+            # как при подключении: без обязательной подписки полагаться на EventSub нельзя
+            self._set_connected(False)
+
+    async def _subscribe_one(self, sub_type, version, condition, required):
+        body = {
+            "type": sub_type,
+            "version": version,
+            "condition": condition,
+            "transport": {"method": "websocket", "session_id": self.session_id},
+        }
+        status, js = await self.helix.request("POST", EVENTSUB_SUBSCRIBE_URL, json=body, token=self.token)
+        if status in (200, 202, 409):
+            # 409 — такая подписка уже есть
+            self._active.add(self._key(sub_type, condition))
+        elif required:
+            logging.error(f"EventSub: не удалось подписаться на {sub_type}: HTTP {status} {js}")
+        else:
+            logging.warning(f"EventSub: необязательная подписка {sub_type} не создана: HTTP {status} {js}")
+
+    async def _subscribe_all(self):
+        self._active = set()
+        for sub_type, version, condition, required in list(self.subscriptions):
+            await self._subscribe_one(sub_type, version, condition, required)
+        if not self._required <= self._active:
+            # без всех подписок полагаться на EventSub нельзя — пусть работает опрос
+            self._active = set()
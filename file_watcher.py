@@ -0,0 +1,161 @@
+# file_watcher.py
+import os
+import sys
+import ctypes
+import ctypes.util
+import struct
+import asyncio
+import logging
+
+# ========== inotify (Linux) ==========
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")
+
+POLL_INTERVAL = 2  # секунд, только если inotify недоступен
+DEBOUNCE = 0.2  # редакторы пишут файл в несколько приёмов
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        getattr(libc, "inotify_init1")  # проверяем наличие символа
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """
+    Следит за файлами с нужными расширениями в каталоге.
+    На Linux — через inotify (без опроса), иначе — опрос os.scandir раз в POLL_INTERVAL.
+    callback(names) получает множество изменившихся/удалённых имён файлов.
+    """
+
+    def __init__(self, directory, callback, suffixes=(".py",)):
+        self.directory = directory
+        self.callback = callback
+        self.suffixes = tuple(suffixes)
+        self.mode = None
+        self._fd = None
+        self._pending = set()
+        self._flush_handle = None
+        self._poll_task = None
+        self._loop = None
+
+    def _interesting(self, name):
+        return name.endswith(self.suffixes) and not name.startswith(".")
+
+    # ---------- запуск / остановка ----------
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self._start_inotify():
+            self.mode = "inotify"
+        else:
+            self.mode = "poll"
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        logging.info(f"Слежение за {self.directory}: {self.mode}")
+
+    def stop(self):
+        if self._fd is not None:
+            try:
+                self._loop.remove_reader(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    # ---------- inotify ----------
+    def _start_inotify(self):
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logging.warning(f"inotify_init1 не удался (errno {ctypes.get_errno()}), переходим на опрос")
+            return False
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK)
+        if wd < 0:
+            logging.warning(f"inotify_add_watch({self.directory}) не удался (errno {ctypes.get_errno()})")
+            os.close(fd)
+            return False
+        self._fd = fd
+        self._loop.add_reader(fd, self._on_inotify_readable)
+        return True
+
+    def _on_inotify_readable(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            name = os.fsdecode(raw)
+            if name and self._interesting(name):
+                self._pending.add(name)
+        self._schedule_flush()
+
+    # ---------- опрос (фолбэк) ----------
+    def _snapshot(self):
+        snap = {}
+        try:
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    if self._interesting(e.name):
+                        try:
+                            st = e.stat()
+                        except FileNotFoundError:
+                            continue
+                        snap[e.name] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+        return snap
+
+    async def _poll_loop(self):
+        prev = self._snapshot()
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                cur = self._snapshot()
+                changed = {n for n in prev.keys() | cur.keys() if prev.get(n) != cur.get(n)}
+                prev = cur
+                if changed:
+                    self._pending |= changed
+                    self._schedule_flush()
+            except Exception as e:
+                logging.exception(f"Ошибка опроса каталога {self.directory}: {e}")
+
+    # ---------- доставка изменений ----------
+    def _schedule_flush(self):
+        if not self._pending:
+            return
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = self._loop.call_later(DEBOUNCE, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        names, self._pending = self._pending, set()
+        try:
+            self.callback(names)
+        except Exception as e:
+            logging.exception(f"Ошибка обработки изменений в {self.directory}: {e}")
@@ -0,0 +1,149 @@
+# followers.py
+import os
+import time
+import struct
+import asyncio
+import logging
+import datetime
+from array import array
+from bisect import bisect_left
+
+FOLLOWERS_FILE = "followers.bin"
+RESYNC_INTERVAL = 24 * 3600  # секунд: полная сверка списка (отписки EventSub не присылает)
+SYNC_RETRY = 15 * 60  # секунд до повтора неудачной сверки
+PAGE_SIZE = 100  # максимум helix/channels/followers за запрос
+
+# followers.bin: заголовок, затем id зрителей по возрастанию и время follow (epoch) — массивы int64
+_HEADER = struct.Struct("<4sIqQ")  # magic, версия, время синхронизации, число записей
+_MAGIC = b"FLWR"
+_VERSION = 1
+
+
+def parse_time(value):
+    """RFC3339 от Twitch ("2024-05-01T12:00:00.123456789Z") -> epoch."""
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        # наносекунды в EventSub: fromisoformat принимает не больше 6 знаков
+        head, rest = value.split(".", 1)
+        frac, tz = rest[:rest.index("+")], rest[rest.index("+"):]
+        value = f"{head}.{frac[:6].ljust(6, '0')}{tz}"
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class FollowerIndex:
+    """
+    Фолловеры канала локально: !follow отвечает поиском в памяти, без Helix.
+    Основной список — два отсортированных array('q') (id и время follow), поиск — bisect;
+    новые follow из EventSub и точечных запросов — в небольшом словаре до следующей сверки.
+    На диске — followers.bin, при старте бот читает его и не скачивает список заново,
+    пока не прошёл RESYNC_INTERVAL.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._ids = array("q")
+        self._times = array("q")
+        self._recent = {}  # user_id -> followed_at
+        self.synced_at = 0
+        self.dirty = False
+        self._retry_at = 0
+        self._sync_lock = asyncio.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self._ids) + len(self._recent)
+
+    @property
+    def stale(self):
+        now = time.time()
+        return now - self.synced_at > RESYNC_INTERVAL and now >= self._retry_at
+
+    # ---------- поиск ----------
+    def lookup(self, user_id):
+        """Время follow (epoch) или None, если зритель в индексе не найден."""
+        user_id = int(user_id)
+        found = self._recent.get(user_id)
+        if found is not None:
+            return found
+        i = bisect_left(self._ids, user_id)
+        if i < len(self._ids) and self._ids[i] == user_id:
+            return self._times[i]
+        return None
+
+    def add(self, user_id, followed_at):
+        self._recent[int(user_id)] = int(followed_at)
+        self.dirty = True
+
+    # ---------- диск ----------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                magic, version, synced_at, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError("неизвестный формат")
+                ids, times = array("q"), array("q")
+                ids.fromfile(f, count)
+                times.fromfile(f, count)
+                rest = f.read()
+            recent = array("q")
+            recent.frombytes(rest)
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать {self.path}: {e} — список фолловеров скачается заново")
+            return
+        self._ids, self._times, self.synced_at = ids, times, synced_at
+        self._recent = dict(zip(recent[0::2], recent[1::2]))
+        logging.info(f"Фолловеры из {self.path}: {len(self)}")
+
+    def _write(self, ids, times, recent, synced_at):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, synced_at, len(ids)))
+            ids.tofile(f)
+            times.tofile(f)
+            # новые follow после сверки — парами (id, время) в хвосте файла
+            array("q", [v for pair in recent.items() for v in pair]).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    async def save(self):
+        self.dirty = False
+        try:
+            await asyncio.to_thread(self._write, self._ids, self._times, dict(self._recent), self.synced_at)
+        except Exception:
+            self.dirty = True
+            logging.exception(f"Не удалось сохранить {self.path}")
+
+    # ---------- сверка с Helix ----------
+    async def sync(self, helix, broadcaster_id, token):
+        """Скачивает весь список фолловеров постранично. Возвращает True при успехе."""
+        async with self._sync_lock:
+            started = time.time()
+            pairs = []
+            cursor = None
+            while True:
+                params = {"broadcaster_id": broadcaster_id, "first": PAGE_SIZE}
+                if cursor:
+                    params["after"] = cursor
+                status, js = await helix.request("GET", "channels/followers", params=params, token=token)
+                if status != 200:
+                    logging.error(f"Сверка фолловеров {broadcaster_id} прервана: HTTP {status} {js}")
+                    self._retry_at = time.time() + SYNC_RETRY
+                    return False
+                for f in js.get("data", []):
+                    pairs.append((int(f["user_id"]), int(parse_time(f["followed_at"]))))
+                cursor = (js.get("pagination") or {}).get("cursor")
+                if not cursor or not js.get("data"):
+                    break
+
+            pairs.sort()
+            self._ids = array("q", [p[0] for p in pairs])
+            self._times = array("q", [p[1] for p in pairs])
+            # follow, пришедшие во время скачивания, могли не попасть в страницы
+            self._recent = {uid: ts for uid, ts in self._recent.items() if ts >= started - 60}
+            self.synced_at = int(started)
+            logging.info(f"Фолловеры {broadcaster_id}: {len(pairs)} за {time.time() - started:.1f}s")
+            await self.save()
+            return True
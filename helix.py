@@ -0,0 +1,259 @@
+# helix.py
+import time
+import asyncio
+import hashlib
+import logging
+from urllib.parse import urlencode
+
+import aiohttp
+
+from ttl_cache import TTLCache
+from metrics import HELIX_LATENCY, HELIX_RESPONSES, timed
+
+TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+HELIX_URL = "https://api.twitch.tv/helix"
+
+MAX_RETRIES = 3  # повторы на 429 / 5xx / сетевые ошибки
+BACKOFF_BASE = 0.5  # секунд, удваивается с каждой попыткой
+BACKOFF_MAX = 8
+
+# сколько живут ответы Helix в кэше (секунды); остальные endpoint'ы не кэшируются
+CACHE_TTLS = {
+    "users": 24 * 3600,  # login -> id практически не меняется
+    "games": 24 * 3600,  # название игры -> game_id
+    "channels": 60,  # game_name / title канала
+    # короткие: одна выборка на всех, кто одновременно вызвал !drops / !follow
+    "drops/campaigns": 60,
+    "channels/followers": 10,
+}
+CACHE_SIZE = 2048
+TOKEN_USER_TTL = 3600  # владелец пользовательского токена (модератор для фильтра и EventSub)
+
+
+async def get_app_access_token(session, client_id, client_secret):
+    """
+    Получает App Access Token (client_credentials).
+    Возвращает (token, expires_in) или (None, 0) при ошибке.
+    """
+    data = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "grant_type": "client_credentials"
+    }
+    try:
+        async with session.post(TOKEN_URL, data=data) as resp:
+            text = await resp.text()
+            if resp.status != 200:
+                logging.error(f"Ошибка получения App Token: HTTP {resp.status} — {text}")
+                return None, 0
+            js = await resp.json()
+            token = js.get("access_token")
+            expires = int(js.get("expires_in", 0))
+            logging.info("Получен App Access Token")
+            return token, expires
+    except Exception as e:
+        logging.exception(f"Исключение при запросе App Token: {e}")
+        return None, 0
+
+
+class HelixClient:
+    """
+    Общий клиент Helix для бота, команд и авто-сообщений.
+    Владеет пулом соединений aiohttp и одним App Access Token на процесс:
+    токен обновляется один раз, даже если его ждут сразу несколько команд.
+    GET-запросы к endpoint'ам из CACHE_TTLS кэшируются, одновременные промахи
+    по одному ключу превращаются в один запрос.
+    С store (SharedStore, режим --workers) токен и кэш общие для всех процессов бота.
+    """
+
+    def __init__(self, client_id, client_secret, store=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.store = store  # SharedStore: токен и кэш общие для процессов --workers
+        self.session = None
+        self.app_token = None
+        self.app_token_expire_at = 0  # epoch
+        self._token_lock = asyncio.Lock()
+        self.cache = TTLCache(maxsize=CACHE_SIZE)
+
+    @property
+    def configured(self):
+        return bool(self.client_id and self.client_secret)
+
+    # ---------- session ----------
+    def get_session(self):
+        # вызывать только из корутин — нужен запущенный loop
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    # ---------- app token ----------
+    def _token_valid(self):
+        return self.app_token and time.time() < self.app_token_expire_at - 30
+
+    async def ensure_token(self):
+        """Возвращает действующий App Access Token или None."""
+        if not self.configured:
+            return None
+        if self._token_valid():
+            return self.app_token
+        async with self._token_lock:
+            # пока ждали lock, токен мог обновить кто-то другой
+            if self._token_valid():
+                return self.app_token
+            if self.store is not None:
+                # токен мог уже получить соседний процесс
+                shared = await asyncio.to_thread(self.store.get, "app_token")
+                if shared:
+                    self.app_token, self.app_token_expire_at = shared["token"], shared["expire_at"]
+                    if self._token_valid():
+                        return self.app_token
+            now = time.time()
+            token, expires = await get_app_access_token(self.get_session(), self.client_id, self.client_secret)
+            if not token:
+                return None
+            self.app_token = token
+            self.app_token_expire_at = now + max(10, int(expires))
+            if self.store is not None:
+                shared = {"token": token, "expire_at": self.app_token_expire_at}
+                await asyncio.to_thread(self.store.set, "app_token", shared, max(10, int(expires)))
+            return token
+
+    async def invalidate_token(self, token=None):
+        if token is None or token == self.app_token:
+            if self.store is not None and self.app_token:
+                await asyncio.to_thread(self.store.delete, "app_token")
+            self.app_token = None
+            self.app_token_expire_at = 0
+
+    # ---------- запросы ----------
+    async def request(self, method, endpoint, params=None, json=None, token=None):
+        """
+        Запрос к Helix (endpoint — путь без префикса, например "users", или полный URL).
+        token — пользовательский токен; по умолчанию используется App Access Token.
+        Возвращает (status, js); status == 0 — запрос не удался совсем.
+        """
+        # метка метрики — путь без префикса и параметров, время считается вместе с повторами
+        label = endpoint.split("?")[0].replace(HELIX_URL + "/", "")
+        with timed(HELIX_LATENCY.labels(label)):
+            status, js = await self._request(method, endpoint, params, json, token)
+        HELIX_RESPONSES.labels(label, status).inc()
+        return status, js
+
+    async def _request(self, method, endpoint, params, json, token):
+        url = endpoint if endpoint.startswith("http") else f"{HELIX_URL}/{endpoint}"
+        refreshed = False
+        attempt = 0
+        while True:
+            bearer = token or await self.ensure_token()
+            if not bearer:
+                return 0, {}
+            headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {bearer}"}
+            delay = None
+            try:
+                async with self.get_session().request(method, url, headers=headers, params=params, json=json) as resp:
+                    status = resp.status
+                    if status == 429 or status >= 500:
+                        delay = self._retry_delay(resp, attempt)
+                    elif status == 401 and token is None and not refreshed:
+                        # токен отозван раньше срока — обновим один раз
+                        logging.warning(f"Helix 401 на {endpoint}, обновляем App Token")
+                        await self.invalidate_token(bearer)
+                        refreshed = True
+                        continue
+                    else:
+                        try:
+                            js = await resp.json(content_type=None)
+                        except (aiohttp.ContentTypeError, ValueError):
+                            js = {}
+                        return status, js or {}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = 0
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                logging.warning(f"Сетевая ошибка Helix {endpoint}: {e!r}")
+
+            if attempt >= MAX_RETRIES:
+                logging.error(f"Helix {endpoint}: HTTP {status}, попытки исчерпаны")
+                return status, {}
+            attempt += 1
+            logging.info(f"Helix {endpoint}: HTTP {status}, повтор через {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(resp, attempt):
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        if resp.status == 429:
+            # Ratelimit-Reset — epoch, когда бакет снова наполнится
+            reset = resp.headers.get("Ratelimit-Reset")
+            if reset and reset.isdigit():
+                delay = min(BACKOFF_MAX, max(delay, int(reset) - time.time()))
+        return max(0.0, delay)
+
+    async def get(self, endpoint, params=None, token=None):
+        ttl = CACHE_TTLS.get(endpoint)
+        if ttl is None:
+            return await self.request("GET", endpoint, params=params, token=token)
+        # ответы не зависят от токена — его в ключ не включаем
+        # (запросы "про сам токен", как get_token_user, идут через request мимо кэша)
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        return await self.cache.get_or_load(
+            key,
+            lambda: self._load(endpoint, key, params, token, ttl),
+            ttl=ttl,
+            cache_if=lambda res: res[0] == 200,
+        )
+
+    async def _load(self, endpoint, key, params, token, ttl):
+        # промах локального кэша: сначала общий кэш процессов, потом Helix
+        if self.store is None:
+            return await self.request("GET", endpoint, params=params, token=token)
+        shared_key = f"helix:{endpoint}?{urlencode(key[1])}"
+        js = await asyncio.to_thread(self.store.get, shared_key)
+        if js is not None:
+            return 200, js
+        status, js = await self.request("GET", endpoint, params=params, token=token)
+        if status == 200:
+            await asyncio.to_thread(self.store.set, shared_key, js, ttl)
+        return status, js
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    # ---------- частые запросы ----------
+    async def get_user(self, login, token=None):
+        """Данные пользователя по логину или None."""
+        status, js = await self.get("users", {"login": login.lower()}, token=token)
+        data = js.get("data") if status == 200 else None
+        return data[0] if data else None
+
+    async def get_token_user(self, token):
+        """Владелец пользовательского токена или None."""
+        # ответ зависит от токена: ключ — его отпечаток, только локальный кэш (в общее хранилище не пишем)
+        key = ("token_user", hashlib.sha256(token.encode("utf-8")).hexdigest())
+        status, js = await self.cache.get_or_load(
+            key,
+            lambda: self.request("GET", "users", token=token),
+            ttl=TOKEN_USER_TTL,
+            cache_if=lambda res: res[0] == 200,
+        )
+        data = js.get("data") if status == 200 else None
+        return data[0] if data else None
+
+    async def get_channel(self, broadcaster_id):
+        """Информация о канале (game_name, title, ...) или None."""
+        status, js = await self.get("channels", {"broadcaster_id": broadcaster_id})
+        data = js.get("data") if status == 200 else None
+        return data[0] if data else None
+
+    async def get_game(self, name):
+        """Игра по точному названию или None."""
+        status, js = await self.get("games", {"name": name})
+        data = js.get("data") if status == 200 else None
+        return data[0] if data else None
@@ -0,0 +1,146 @@
+# log_setup.py
+import os
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# rate_key -> (сколько строк, за сколько секунд); остальное подавляется
+RATE_LIMITS = {
+    "chat_drop": (5, 30),
+}
+DEFAULT_RATE_LIMIT = (10, 10)
+
+
+class ThrottleFilter(logging.Filter):
+    """
+    Фильтр частых строк, работает до постановки записи в очередь.
+      extra={"rate_key": "..."} — не больше RATE_LIMITS[key] строк за окно,
+        о подавленных сообщает следующая пропущенная строка;
+      extra={"sample": N} — пишется каждая N-я строка.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._windows = {}  # key -> [window_start, count, suppressed]
+        self._samples = {}  # (pathname, lineno) -> counter
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "rate_key", None)
+        if key is not None:
+            return self._rate_limit(record, key)
+        every = getattr(record, "sample", None)
+        if every:
+            return self._sample(record, int(every))
+        return True
+
+    def _rate_limit(self, record, key):
+        limit, period = RATE_LIMITS.get(key, DEFAULT_RATE_LIMIT)
+        now = time.monotonic()
+        with self._lock:
+            w = self._windows.get(key)
+            if w is None or now - w[0] >= period:
+                suppressed = w[2] if w else 0
+                w = [now, 0, 0]
+                self._windows[key] = w
+                if suppressed:
+                    record.msg = f"{record.msg} (+{suppressed} подавлено за {period}s)"
+            if w[1] >= limit:
+                w[2] += 1
+                return False
+            w[1] += 1
+        return True
+
+    def _sample(self, record, every):
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            n = self._samples.get(site, 0)
+            self._samples[site] = n + 1
+        if n % every:
+            return False
+        record.msg = f"{record.msg} (1 из {every})"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON-строка (для сбора логов)."""
+
+    def format(self, record):
+        data = {
+            "ts": record.created,
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        # из очереди запись приходит с уже отформатированным traceback (см. _QueueHandler)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare склеивает traceback с текстом сообщения — тогда JSON-лог теряет поле exc.
+    Здесь текст и traceback (в exc_text) остаются раздельными, форматтеры в потоке собирают их сами.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(logs_dir, json_output=False, level=logging.INFO, filename="bot.log"):
+    """
+    Логи через очередь: в event loop запись только кладётся в queue.Queue,
+    а запись в файл, ротация и вывод в консоль идут в фоновом потоке QueueListener.
+    """
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file = os.path.join(logs_dir, filename)
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(LOG_FORMAT))
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ThrottleFilter())
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+    listener.start()
+    # при выходе дописываем всё, что осталось в очереди
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener):
+    # listener могли уже остановить вручную
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,243 @@
+# metrics.py
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._new_child()
+            self._children[key] = child
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._children.items():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        cumulative = 0
+        for bound, n in zip(self.bounds + (float("inf"),), child.counts):
+            cumulative += n
+            le = 'le="%s"' % _fmt(bound)
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(child.sum)}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {child.count}"
+
+
+class CallbackGauge(_Metric):
+    """Gauge, значения которого считаются при выдаче: fn() -> [(label_values, value), ...]."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames, fn):
+        super().__init__(name, help_text, labelnames)
+        self.fn = fn
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            for values, value in self.fn():
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {_fmt(value)}")
+        except Exception as e:
+            logging.warning(f"Метрика {self.name} не посчитана: {e}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, labelnames, fn):
+        return self.register(CallbackGauge(name, help_text, labelnames, fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ========== метрики бота ==========
+COMMAND_CALLS = REGISTRY.counter("bot_command_invocations_total", "Вызовы кастомных команд", ["command"])
+COMMAND_ERRORS = REGISTRY.counter("bot_command_errors_total", "Ошибки загрузки/выполнения команд", ["command"])
+COMMAND_TIMEOUTS = REGISTRY.counter("bot_command_timeouts_total", "Команды, не уложившиеся в TIMEOUT", ["command"])
+COMMAND_REJECTIONS = REGISTRY.counter(
+    "bot_command_rejections_total", "Вызовы сверх MAX_CONCURRENCY команды", ["command"]
+)
+COMMAND_COALESCED = REGISTRY.counter(
+    "bot_command_coalesced_total", "Вызовы, объединённые с таким же вызовом (COALESCE)", ["command"]
+)
+COMMAND_LATENCY = REGISTRY.histogram("bot_command_latency_seconds", "Время выполнения команды", ["command"])
+HELIX_LATENCY = REGISTRY.histogram("bot_helix_request_seconds", "Время запроса к Helix", ["endpoint"])
+HELIX_RESPONSES = REGISTRY.counter("bot_helix_responses_total", "Ответы Helix по кодам", ["endpoint", "status"])
+AUTO_MESSAGES_SENT = REGISTRY.counter("bot_auto_messages_sent_total", "Отправленные авто-сообщения", ["file"])
+SEND_WAIT = REGISTRY.histogram(
+    "bot_chat_send_wait_seconds", "Ожидание сообщения в очереди отправки", ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15, 30, 60, 120),
+)
+MODERATION_ACTIONS = REGISTRY.counter(
+    "bot_moderation_actions_total", "Сообщения, остановленные фильтром", ["action", "reason"]
+)
+COOLDOWN_REJECTIONS = REGISTRY.counter("bot_cooldown_rejections_total", "Команды, отброшенные по cooldown")
+LOOP_LAG = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds", "Опоздание event loop относительно запланированного пробуждения",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+async def monitor_loop_lag(interval=0.5):
+    """Меряет, насколько позже запланированного просыпается корутина — это и есть лаг event loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - t0 - interval))
+
+
+# ========== HTTP /metrics ==========
+async def _handle_http(reader, writer, registry):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), 5)
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            if line in (b"\r\n", b"\n", b""):
+                break
+        parts = request_line.split()
+        path = parts[1].split(b"?")[0] if len(parts) > 1 else b""
+        if path == b"/metrics":
+            body = registry.render().encode("utf-8")
+            status = "200 OK"
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = b"not found\n"
+            status = "404 Not Found"
+            ctype = "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("ascii") + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port, host="127.0.0.1", registry=REGISTRY):
+    server = await asyncio.start_server(lambda r, w: _handle_http(r, w, registry), host, port)
+    logging.info(f"Метрики: http://{host}:{port}/metrics")
+    return server
+
+
+class timed:
+    """with timed(HISTOGRAM.labels(...)): ... — записывает длительность блока."""
+
+    __slots__ = ("child", "t0")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.t0)
+        return False
@@ -0,0 +1,233 @@
+# moderation.py
+import os
+import re
+import time
+import logging
+from collections import OrderedDict, deque
+
+from dispatcher import NORMALIZE_TABLE
+
+ACTIONS = ("ignore", "delete", "timeout")
+
+# невидимые символы, которыми разбивают слова ("ф​раза"), — выбрасываются
+_INVISIBLE = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+
+# похожие буквы: каноническая -> все, что к ней сводится (переходы автомата по ним одинаковые)
+_LOOKALIKE_VARIANTS = {}
+for _src, _dst in NORMALIZE_TABLE.items():
+    _LOOKALIKE_VARIANTS.setdefault(_dst, []).append(chr(_src))
+
+
+def prepare_text(text):
+    """Текст сообщения для автомата: нижний регистр, без невидимых символов, пробелы схлопнуты."""
+    return " ".join(_INVISIBLE.sub("", text).lower().split())
+
+
+def normalize_text(text):
+    """Фраза из списка: как prepare_text, плюс похожие латинские/кириллические буквы — к одной форме."""
+    return prepare_text(text).translate(NORMALIZE_TABLE)
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо–Корасик: все фразы ищутся за один проход по тексту,
+    время проверки зависит от длины сообщения, а не от размера списка.
+    Переходы — словари по символу; переходов по суффиксным ссылкам на проверке
+    не больше, чем символов в тексте. variants (буква -> похожие буквы) добавляют
+    те же переходы по похожим буквам, чтобы текст не приходилось нормализовать.
+    """
+
+    def __init__(self, patterns, variants=None):
+        goto = [{}]
+        out = [None]  # узел -> id фразы, которая в нём заканчивается (или через суффикс)
+        for pid, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(None)
+                node = nxt
+            if out[node] is None:
+                out[node] = pid
+
+        # обход в ширину: суффиксная ссылка узла — самый длинный его суффикс, который есть в боре
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                if node:
+                    f = fail[node]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                if out[nxt] is None:
+                    out[nxt] = out[fail[nxt]]
+        if variants:
+            for edges in goto:
+                for ch, nxt in list(edges.items()):
+                    for alt in variants.get(ch, ()):
+                        edges.setdefault(alt, nxt)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self.size = len(patterns)
+
+    def search(self, text):
+        """id первой найденной фразы или None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            if nxt is not None:
+                node = nxt
+                if out[node] is not None:
+                    return out[node]
+        return None
+
+
+class BannedList:
+    """
+    Скомпилированные списки запрещённого: фразы — в одном автомате, регулярные выражения —
+    в одном общем regex (группа на выражение). Совпадение — (файл, действие, исходная строка).
+    """
+
+    def __init__(self, phrases=(), regexes=()):
+        # phrases / regexes: (текст, файл, действие)
+        self.phrase_info = [(src, action, text) for text, src, action in phrases]
+        self.automaton = AhoCorasick([normalize_text(text) for text, _, _ in phrases], _LOOKALIKE_VARIANTS)
+        self.regex_info = []
+        parts = []
+        for text, src, action in regexes:
+            try:
+                re.compile(text)
+            except re.error as e:
+                logging.error(f"Фильтр: неверное выражение в {src}: {text!r} ({e})")
+                continue
+            parts.append(f"(?P<r{len(self.regex_info)}>{text})")
+            self.regex_info.append((src, action, text))
+        self.regex = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+
+    def __len__(self):
+        return self.automaton.size + len(self.regex_info)
+
+    def match(self, raw, prepared):
+        """(файл, действие, шаблон) первого совпадения или None; prepared — prepare_text(raw)."""
+        pid = self.automaton.search(prepared)
+        if pid is not None:
+            return self.phrase_info[pid]
+        if self.regex is not None:
+            m = self.regex.search(raw)
+            if m:
+                return self.regex_info[int(m.lastgroup[1:])]
+        return None
+
+    @classmethod
+    def from_dir(cls, directory, actions, default_action):
+        """
+        Читает directory/*.txt: фраза на строку, "re:" — регулярное выражение, "#" — комментарий.
+        Действие файла — actions[имя файла] или default_action.
+        """
+        phrases, regexes = [], []
+        if os.path.isdir(directory):
+            for fname in sorted(os.listdir(directory)):
+                if not fname.endswith(".txt") or fname.startswith("."):
+                    continue
+                action = actions.get(fname, default_action)
+                with open(os.path.join(directory, fname), "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line or line.startswith("#"):
+                            continue
+                        if line.startswith("re:"):
+                            regexes.append((line[3:].strip(), fname, action))
+                        else:
+                            phrases.append((line, fname, action))
+        return cls(phrases, regexes)
+
+
+class FloodTracker:
+    """
+    Флуд: больше limit сообщений одного зрителя за window секунд (скользящее окно).
+    Сработав, ключ остаётся помеченным ещё window секунд — все его сообщения за это время
+    тоже флуд. Зрители упорядочены по последнему сообщению, поэтому молчащих дольше окна
+    снимаем с начала за O(1) на каждого.
+    """
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._users = OrderedDict()  # key -> deque времён последних limit сообщений
+        self._flagged = {}  # key -> до какого времени флудит
+
+    def __len__(self):
+        return len(self._users)
+
+    def hit(self, key, now=None):
+        """
+        Учитывает сообщение: None — не флуд, "new" — только что превысил лимит,
+        "repeat" — флудит дальше (действие уже было, повторять его не нужно).
+        """
+        now = time.monotonic() if now is None else now
+        users = self._users
+        times = users.pop(key, None)
+        if times is None:
+            times = deque(maxlen=self.limit + 1)
+        times.append(now)
+        users[key] = times
+        while users:
+            first_key, first = next(iter(users.items()))
+            if now - first[-1] <= self.window:
+                break
+            users.popitem(last=False)
+            self._flagged.pop(first_key, None)
+
+        until = self._flagged.get(key)
+        if until is not None:
+            if now < until:
+                return "repeat"
+            del self._flagged[key]
+        if len(times) > self.limit and now - times[0] <= self.window:
+            self._flagged[key] = now + self.window
+            return "new"
+        return None
+
+
+class MessageFilter:
+    """
+    Фильтр входящих сообщений перед командами: запрещённые фразы/выражения и флуд.
+    check() возвращает (действие, причина) или None; исполняет действия бот.
+    """
+
+    def __init__(self, flood_limit, flood_window, flood_action, exempt_mods=True):
+        self.banned = BannedList()
+        self.flood = FloodTracker(flood_limit, flood_window) if flood_limit else None
+        self.flood_action = flood_action
+        self.exempt_mods = exempt_mods
+
+    def set_banned(self, banned):
+        self.banned = banned
+
+    def check(self, channel, author, content, now=None):
+        if self.exempt_mods and (getattr(author, "is_mod", False) or getattr(author, "is_broadcaster", False)):
+            return None
+        if self.flood is not None:
+            flood = self.flood.hit((channel, author.name.lower()), now)
+            if flood == "new" or (flood == "repeat" and self.flood_action != "timeout"):
+                return self.flood_action, "flood"
+            if flood == "repeat":
+                # таймаут уже выдан — сообщение только не пускаем дальше
+                return "ignore", "flood"
+        if len(self.banned):
+            found = self.banned.match(content, prepare_text(content))
+            if found:
+                src, action, pattern = found
+                return action, f"{src}: {pattern}"
+        return None
@@ -0,0 +1,25 @@
+# Фильтр сообщений (moderation.py): проверяет каждое сообщение до команд
+# Списки — banned_words/*.txt: фраза на строку, "re:" в начале — регулярное выражение,
+# "#" — комментарий. Фразы ищутся без учёта регистра, ё/е и похожих латинских/кириллических
+# букв; правка файла подхватывается без перезапуска.
+#
+# Действия: "ignore" — сообщение не обрабатывается ботом (команды не выполняются),
+#           "delete" — ещё и удаляется, "timeout" — зритель получает таймаут на TIMEOUT_SECONDS.
+# delete/timeout нужен USER_OAUTH модератора канала
+# (scope moderator:manage:chat_messages и moderator:manage:banned_users).
+
+MODERATION_ENABLED = True
+
+BANNED_ACTION = 'delete'  # действие для списков по умолчанию
+# своё действие для отдельного файла
+LIST_ACTIONS = {
+    'links.txt': 'timeout',
+}
+
+# флуд: больше FLOOD_MESSAGES сообщений за FLOOD_WINDOW секунд (0 — не проверять)
+FLOOD_MESSAGES = 8
+FLOOD_WINDOW = 10
+FLOOD_ACTION = 'ignore'
+
+TIMEOUT_SECONDS = 60
+EXEMPT_MODS = True  # модераторов и стримера не проверяем
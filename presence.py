@@ -0,0 +1,119 @@
+# presence.py
+import time
+import random
+
+PRESENCE_TTL = 30 * 60  # секунд: зритель без JOIN и сообщений дольше — считаем ушедшим
+ACTIVITY_WINDOW = 512  # последних сообщений, по которым считается активность
+ACTIVITY_TTL = 10 * 60  # сообщения старше не учитываются при выборе "по активности"
+ATTEMPTS = 16  # случайных проб до перебора (нужен, только если почти все исключены)
+
+
+class PresenceIndex:
+    """
+    Кто сейчас в чате канала: пополняется JOIN/PART и сообщениями,
+    зрители без активности дольше PRESENCE_TTL выпадают сами.
+    Зрители лежат в массиве, удаление — перестановкой с последним,
+    поэтому случайный выбор и удаление — O(1).
+    Выбор "по активности" берёт автора случайного из последних ACTIVITY_WINDOW сообщений:
+    вероятность пропорциональна числу его свежих сообщений.
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL, window=ACTIVITY_WINDOW, activity_ttl=ACTIVITY_TTL):
+        self.ttl = ttl
+        self.activity_ttl = activity_ttl
+        self.seeded = False  # начальный список (NAMES) уже взят
+        self._logins = []
+        self._names = []
+        self._seen = []
+        self._pos = {}  # login -> индекс в массивах
+        self._recent = [None] * window  # кольцо (login, время сообщения)
+        self._head = 0
+        self._filled = 0  # занятых ячеек кольца: пока чат тихий, пустые не разыгрываются
+
+    def __len__(self):
+        return len(self._logins)
+
+    def __contains__(self, name):
+        return name.lower() in self._pos
+
+    # ---------- обновление ----------
+    def join(self, name, now=None):
+        login = name.lower()
+        now = time.time() if now is None else now
+        i = self._pos.get(login)
+        if i is None:
+            self._pos[login] = len(self._logins)
+            self._logins.append(login)
+            self._names.append(name)
+            self._seen.append(now)
+        else:
+            self._names[i] = name
+            self._seen[i] = now
+        return login
+
+    def touch(self, name, now=None):
+        """Сообщение в чате: зритель точно здесь и активен."""
+        now = time.time() if now is None else now
+        login = self.join(name, now)
+        self._recent[self._head] = (login, now)
+        self._head = (self._head + 1) % len(self._recent)
+        if self._filled < len(self._recent):
+            self._filled += 1
+
+    def part(self, name):
+        i = self._pos.get(name.lower())
+        if i is not None:
+            self._remove(i)
+
+    def seed(self, names, now=None):
+        now = time.time() if now is None else now
+        for name in names:
+            self.join(name, now)
+        self.seeded = True
+
+    def _remove(self, i):
+        last = len(self._logins) - 1
+        del self._pos[self._logins[i]]
+        if i != last:
+            self._logins[i] = self._logins[last]
+            self._names[i] = self._names[last]
+            self._seen[i] = self._seen[last]
+            self._pos[self._logins[i]] = i
+        self._logins.pop()
+        self._names.pop()
+        self._seen.pop()
+
+    # ---------- выбор ----------
+    def sample(self, exclude=(), weighted=False, now=None):
+        """
+        Случайный зритель (имя как в чате) не из exclude (логины в нижнем регистре) или None.
+        weighted=True — чаще те, кто больше писал за последние ACTIVITY_TTL.
+        """
+        now = time.time() if now is None else now
+        if weighted and self._filled:
+            ring, filled = self._recent, self._filled
+            for _ in range(ATTEMPTS):
+                slot = ring[random.randrange(filled)]
+                if now - slot[1] > self.activity_ttl or slot[0] in exclude:
+                    continue
+                i = self._pos.get(slot[0])
+                if i is not None:
+                    return self._names[i]
+
+        for _ in range(ATTEMPTS):
+            if not self._logins:
+                return None
+            i = random.randrange(len(self._logins))
+            if now - self._seen[i] > self.ttl:
+                self._remove(i)
+            elif self._logins[i] not in exclude:
+                return self._names[i]
+
+        # почти все исключены или ушли — перебираем оставшихся
+        fresh = []
+        for i in range(len(self._logins) - 1, -1, -1):
+            if now - self._seen[i] > self.ttl:
+                self._remove(i)
+            elif self._logins[i] not in exclude:
+                fresh.append(self._names[i])
+        return random.choice(fresh) if fresh else None
@@ -1,16 +1,77 @@
 import json
 import os
+import asyncio
+import logging
 
 SCORE_FILE = "score.json"
 
-def load_score():
-    if not os.path.exists(SCORE_FILE):
+def load_score(path=SCORE_FILE):
+    if not os.path.exists(path):
         data = {"score": 0, "goal": 100}
-        save_score(data)  # создаём файл при первом запуске
+        save_score(data, path)  # создаём файл при первом запуске
         return data
-    with open(SCORE_FILE, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_score(data):
-    with open(SCORE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+def save_score(data, path=SCORE_FILE):
+    # пишем во временный файл и подменяем им старый — падение посреди записи не обрежет score.json
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ScoreStore:
+    """
+    Счёт для !цель в памяти. Чтение — без диска, изменения идут под lock,
+    на диск они уходят с задержкой FLUSH_DELAY (write-behind) атомарной заменой файла.
+    Формат score.json прежний: score, goal и current (== score).
+    """
+
+    FLUSH_DELAY = 1.0  # секунд
+
+    def __init__(self, path=SCORE_FILE):
+        self.path = path
+        self._data = load_score(path)
+        self._data.setdefault("score", 0)
+        self._data.setdefault("goal", 100)
+        self._lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._dirty = False
+        self._flush_task = None
+
+    async def get(self):
+        # async — как у SharedScoreStore, где чтение идёт в SQLite
+        return dict(self._data)
+
+    async def add(self, delta):
+        """Меняет счёт на delta в пределах [0, goal] и возвращает новые данные."""
+        async with self._lock:
+            data = self._data
+            data["score"] = max(0, min(data["score"] + delta, data["goal"]))
+            data["current"] = data["score"]
+            self._mark_dirty()
+            return dict(data)
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.FLUSH_DELAY)
+        await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._dirty:
+                self._dirty = False
+                snapshot = dict(self._data)
+                try:
+                    await asyncio.to_thread(save_score, snapshot, self.path)
+                except Exception:
+                    logging.exception(f"Не удалось сохранить {self.path}")
+                    self._dirty = True
+                    return
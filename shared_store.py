@@ -0,0 +1,168 @@
+# shared_store.py
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+
+from score_utils import load_score
+
+# в режиме --workers процессы бота делят один файл SQLite (WAL: чтения не ждут записи)
+SHARED_STORE_FILE = "shared_state.sqlite3"
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    channel TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    goal INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    channel TEXT PRIMARY KEY,
+    worker INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """
+    Общее состояние процессов бота в SQLite (WAL):
+      kv — App Access Token и ответы Helix с временем жизни (просроченные чистит супервизор);
+      scores — счёт !цель по каналам, изменение атомарно (BEGIN IMMEDIATE);
+      assignments / workers — какой процесс обслуживает канал и heartbeat процессов.
+    Соединение одно на процесс, обращения из разных потоков идут под lock.
+    """
+
+    def __init__(self, path=SHARED_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE сразу берёт блокировку записи — чтение и изменение не разойдутся между процессами
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    # ---------- kv ----------
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        with self._lock:
+            return self._db.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    # ---------- счёт ----------
+    def score_init(self, channel, data):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO scores (channel, score, goal) VALUES (?, ?, ?)",
+                (channel, int(data.get("score", 0)), int(data.get("goal", 100))),
+            )
+
+    def score_get(self, channel):
+        with self._lock:
+            row = self._db.execute("SELECT score, goal FROM scores WHERE channel = ?", (channel,)).fetchone()
+        score, goal = row if row else (0, 100)
+        return {"score": score, "goal": goal, "current": score}
+
+    def score_add(self, channel, delta):
+        def add(db):
+            row = db.execute("SELECT score, goal FROM scores WHERE channel = ?", (channel,)).fetchone()
+            score, goal = row if row else (0, 100)
+            score = max(0, min(score + delta, goal))
+            db.execute("INSERT OR REPLACE INTO scores (channel, score, goal) VALUES (?, ?, ?)", (channel, score, goal))
+            return {"score": score, "goal": goal, "current": score}
+        return self._transaction(add)
+
+    # ---------- распределение каналов ----------
+    def channels_of(self, worker):
+        with self._lock:
+            rows = self._db.execute("SELECT channel FROM assignments WHERE worker = ?", (worker,)).fetchall()
+        return sorted(r[0] for r in rows)
+
+    def set_assignments(self, mapping):
+        def replace(db):
+            db.execute("DELETE FROM assignments")
+            db.executemany("INSERT INTO assignments (channel, worker) VALUES (?, ?)", mapping.items())
+        self._transaction(replace)
+
+    def heartbeat(self, worker):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers (worker, pid, heartbeat) VALUES (?, ?, ?)",
+                (worker, os.getpid(), time.time()),
+            )
+
+    def heartbeats(self):
+        with self._lock:
+            return {w: (pid, hb) for w, pid, hb in self._db.execute("SELECT worker, pid, heartbeat FROM workers")}
+
+
+class SharedScoreStore:
+    """
+    Счёт !цель в SharedStore — тот же интерфейс, что у ScoreStore.
+    При первом запуске переносит значение из score.json канала.
+    """
+
+    def __init__(self, store, channel, seed_path=None):
+        self.store = store
+        self.channel = channel
+        if seed_path and os.path.exists(seed_path):
+            try:
+                store.score_init(channel, load_score(seed_path))
+            except Exception as e:
+                logging.warning(f"Не удалось перенести {seed_path} в общее хранилище: {e}")
+
+    async def get(self):
+        return await asyncio.to_thread(self.store.score_get, self.channel)
+
+    async def add(self, delta):
+        """Меняет счёт на delta в пределах [0, goal] и возвращает новые данные."""
+        return await asyncio.to_thread(self.store.score_add, self.channel, delta)
+
+    async def flush(self):
+        # каждое изменение уже записано транзакцией
+        return None
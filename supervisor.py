@@ -0,0 +1,154 @@
+# supervisor.py
+import os
+import sys
+import time
+import signal
+import logging
+import subprocess
+
+from shared_store import SharedStore, SHARED_STORE_FILE
+
+CHECK_INTERVAL = 1  # секунд между проверками процессов
+HEARTBEAT_TIMEOUT = 30  # воркер без heartbeat дольше — считаем зависшим и перезапускаем
+RESTART_MIN = 1  # секунд до перезапуска упавшего воркера, удваивается до RESTART_MAX
+RESTART_MAX = 60
+STABLE_AFTER = 60  # проработал столько — задержка перезапуска сбрасывается
+PURGE_INTERVAL = 10 * 60  # секунд: чистка просроченных записей kv в общем хранилище
+
+
+def balance(assignment, channels, workers):
+    """
+    Раскладывает каналы по живым воркерам, двигая как можно меньше каналов:
+    каналы упавших воркеров уходят самым свободным, затем нагрузка выравнивается до разницы в 1.
+    """
+    if not workers:
+        return dict(assignment)
+    load = {w: [] for w in workers}
+    orphans = []
+    for ch in channels:
+        w = assignment.get(ch)
+        if w in load:
+            load[w].append(ch)
+        else:
+            orphans.append(ch)
+    for ch in orphans:
+        min(load.values(), key=len).append(ch)
+    while True:
+        most = max(load.values(), key=len)
+        least = min(load.values(), key=len)
+        if len(most) - len(least) <= 1:
+            break
+        least.append(most.pop())
+    return {ch: w for w, chs in load.items() for ch in chs}
+
+
+class Supervisor:
+    """
+    Режим `python bot.py --workers N`: каналы CHANNELS делятся между N процессами бота,
+    у каждого свои IRC-соединения. Назначения, токен, кэш Helix и счёт лежат в SharedStore.
+    Упавший или зависший воркер перезапускается с задержкой, а его каналы на это время
+    переходят к остальным; после перезапуска нагрузка снова выравнивается.
+    """
+
+    def __init__(self, channels, workers, store_path=SHARED_STORE_FILE, script=None):
+        self.channels = list(channels)
+        self.workers = workers
+        self.store_path = os.path.abspath(store_path)
+        self.script = script or os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+        self.store = SharedStore(self.store_path)
+        self.procs = {}  # worker -> Popen или None
+        self.started_at = {}
+        self.restart_at = {}
+        self.restart_delay = {w: RESTART_MIN for w in range(workers)}
+        self.assignment = {}
+        self._stopping = False
+
+    def _spawn(self, worker):
+        env = dict(os.environ, WORKER_ID=str(worker), SHARED_STORE=self.store_path)
+        self.procs[worker] = subprocess.Popen([sys.executable, self.script], env=env)
+        self.started_at[worker] = time.time()
+        self.restart_at.pop(worker, None)
+        logging.info(f"Воркер {worker} запущен (pid {self.procs[worker].pid})")
+
+    def _alive(self):
+        return [w for w, p in self.procs.items() if p is not None and p.poll() is None]
+
+    def _rebalance(self):
+        new = balance(self.assignment, self.channels, self._alive())
+        if new != self.assignment:
+            moved = sum(1 for ch in self.channels if new.get(ch) != self.assignment.get(ch))
+            self.assignment = new
+            self.store.set_assignments(new)
+            logging.info(f"Каналы перераспределены: переехало {moved}")
+
+    def _check(self):
+        now = time.time()
+        heartbeats = self.store.heartbeats()
+        changed = False
+        for w, proc in list(self.procs.items()):
+            if proc is None:
+                if now >= self.restart_at.get(w, 0):
+                    self._spawn(w)
+                    changed = True
+                continue
+            code = proc.poll()
+            if code is None:
+                # heartbeat засчитываем только от текущего процесса
+                pid, hb = heartbeats.get(w, (None, 0))
+                last = hb if pid == proc.pid else self.started_at[w]
+                if now - last > HEARTBEAT_TIMEOUT:
+                    logging.error(f"Воркер {w} не отвечает {now - last:.0f}s — перезапуск")
+                    proc.kill()
+                    proc.wait()
+                    code = proc.returncode
+                else:
+                    continue
+            # процесс завершился: каналы — остальным, сам — на перезапуск
+            if now - self.started_at[w] >= STABLE_AFTER:
+                self.restart_delay[w] = RESTART_MIN
+            delay = self.restart_delay[w]
+            self.restart_delay[w] = min(RESTART_MAX, delay * 2)
+            self.procs[w] = None
+            self.restart_at[w] = now + delay
+            logging.error(f"Воркер {w} завершился (код {code}), перезапуск через {delay}s")
+            changed = True
+        if changed:
+            self._rebalance()
+
+    def run(self):
+        logging.info(f"Супервизор: {len(self.channels)} каналов на {self.workers} воркеров")
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        self.assignment = balance({}, self.channels, list(range(self.workers)))
+        self.store.set_assignments(self.assignment)
+        for w in range(self.workers):
+            self._spawn(w)
+        purge_at = time.time() + PURGE_INTERVAL
+        try:
+            while not self._stopping:
+                time.sleep(CHECK_INTERVAL)
+                self._check()
+                if time.time() >= purge_at:
+                    # иначе ключи с истёкшим TTL (ответы Helix по зрителям) копятся в файле вечно
+                    purged = self.store.purge_expired()
+                    if purged:
+                        logging.info(f"Общее хранилище: удалено просроченных записей {purged}")
+                    purge_at = time.time() + PURGE_INTERVAL
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        self._stopping = True
+
+    def _shutdown(self):
+        procs = [p for p in self.procs.values() if p is not None and p.poll() is None]
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        self.store.close()
+        logging.info("Супервизор остановлен")
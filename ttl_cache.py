@@ -0,0 +1,101 @@
+# ttl_cache.py
+import time
+import asyncio
+from collections import OrderedDict
+
+
+class _LoaderCancelled(Exception):
+    """Вызов, который загружал значение, отменили — ждавшие его загружают сами."""
+
+
+class TTLCache:
+    """
+    LRU-кэш ограниченного размера со сроком жизни записей.
+    get_or_load объединяет одновременные промахи по одному ключу в один вызов loader.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expire_at, value)
+        self._inflight = {}  # key -> Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # промахи, которые дождались чужого запроса
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return item[1]
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    async def get_or_load(self, key, loader, ttl=None, cache_if=None):
+        """
+        Значение из кэша или результат await loader().
+        cache_if(value) -> bool решает, стоит ли класть результат в кэш (например, только успешные ответы).
+        """
+        missing = object()
+        while True:
+            value = self.get(key, missing)
+            if value is not missing:
+                self.hits += 1
+                return value
+
+            fut = self._inflight.get(key)
+            if fut is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(fut)
+            except _LoaderCancelled:
+                # отменили не нас, а загружавшего — пробуем сами (или ждём нового загружающего)
+                continue
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            fut.set_exception(_LoaderCancelled())
+            fut.exception()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            # исключение уже передано ждущим; если их нет — не шумим "never retrieved"
+            fut.exception()
+            raise
+        else:
+            if cache_if is None or cache_if(value):
+                self.set(key, value, ttl)
+            fut.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }